@@ -0,0 +1,50 @@
+from ldap_filter import Filter
+
+
+def time_attribute_methods():
+    attr = Filter.attribute('cn')
+    attr.present()
+    attr.equal_to('value (with) *specials*')
+    attr.starts_with('prefix')
+    attr.ends_with('suffix')
+    attr.contains('middle')
+    attr.approx('smith')
+    attr.lte('100')
+    attr.gte('10')
+    attr.raw('raw*value')
+
+
+def time_build_group():
+    Filter.AND([
+        Filter.attribute('objectClass').equal_to('person'),
+        Filter.OR([
+            Filter.attribute('department').equal_to('accounting'),
+            Filter.attribute('department').equal_to('sales'),
+        ]),
+        Filter.NOT(Filter.attribute('status').equal_to('terminated')),
+    ])
+
+
+def time_build_wide():
+    attr = Filter.attribute('uid')
+    Filter.OR([attr.equal_to('user{}'.format(i)) for i in range(1000)])
+
+
+def time_build_equal_to_any_50000():
+    Filter.attribute('uid').equal_to_any(['user{}'.format(i) for i in range(50000)])
+
+
+def time_escape_many_50000():
+    Filter.escape_many(['user (number) {}*'.format(i) for i in range(50000)])
+
+
+def time_escape():
+    Filter.escape('a value with (parentheses), *stars* and \\backslashes\\ ' * 4)
+
+
+def time_unescape():
+    Filter.unescape('a value with \\28parentheses\\29, \\2astars\\2a and \\5cbackslashes\\5c ' * 4)
+
+
+def time_unescape_utf8():
+    Filter.unescape('caf\\c3\\a9 na\\c3\\afve r\\c3\\a9sum\\c3\\a9 ' * 4)
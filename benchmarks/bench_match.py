@@ -0,0 +1,124 @@
+from ldap_filter import Filter
+
+SINGLE = {
+    'cn': 'John Smith',
+    'sn': 'Smith',
+    'mail': 'john.smith@example.com',
+    'age': '42',
+    'objectClass': 'person',
+}
+MULTI = {
+    'cn': ['Johnny', 'Jon', 'John Smith'],
+    'sn': ['Smyth', 'Smithe', 'Smith'],
+    'mail': ['john@example.org', 'jsmith@example.net', 'john.smith@example.com'],
+    'age': ['x', '17', '42'],
+    'objectClass': ['top', 'organizationalPerson', 'person'],
+}
+
+PRESENT = Filter.parse('(mail=*)')
+EQUAL = Filter.parse('(sn=smith)')
+SUBSTRING = Filter.parse('(mail=*smith*example.com)')
+GTE = Filter.parse('(age>=40)')
+LTE = Filter.parse('(age<=50)')
+APPROX = Filter.parse('(sn~=smyth)')
+AND = Filter.parse('(&(objectClass=person)(sn=smith)(age>=18))')
+OR = Filter.parse('(|(sn=jones)(sn=brown)(sn=smith))')
+NOT = Filter.parse('(!(sn=jones))')
+WIDE = Filter.parse('(|' + ''.join('(cn=user{})'.format(i) for i in range(1000)) + '(cn=john smith))')
+
+COMPILED = AND.compile()
+COMPILED_WIDE = WIDE.compile()
+PROGRAM = AND.to_program()
+PROGRAM_WIDE = WIDE.to_program()
+
+
+def time_present_single():
+    PRESENT.match(SINGLE)
+
+
+def time_present_multi():
+    PRESENT.match(MULTI)
+
+
+def time_equal_single():
+    EQUAL.match(SINGLE)
+
+
+def time_equal_multi():
+    EQUAL.match(MULTI)
+
+
+def time_substring_single():
+    SUBSTRING.match(SINGLE)
+
+
+def time_substring_multi():
+    SUBSTRING.match(MULTI)
+
+
+def time_gte_single():
+    GTE.match(SINGLE)
+
+
+def time_gte_multi():
+    GTE.match(MULTI)
+
+
+def time_lte_single():
+    LTE.match(SINGLE)
+
+
+def time_lte_multi():
+    LTE.match(MULTI)
+
+
+def time_approx_single():
+    APPROX.match(SINGLE)
+
+
+def time_approx_multi():
+    APPROX.match(MULTI)
+
+
+def time_and_single():
+    AND.match(SINGLE)
+
+
+def time_and_multi():
+    AND.match(MULTI)
+
+
+def time_or_single():
+    OR.match(SINGLE)
+
+
+def time_not_single():
+    NOT.match(SINGLE)
+
+
+def time_wide_or():
+    WIDE.match(SINGLE)
+
+
+def time_compiled_and_single():
+    COMPILED(SINGLE)
+
+
+def time_compiled_and_multi():
+    COMPILED(MULTI)
+
+
+def time_compiled_wide_or():
+    COMPILED_WIDE(SINGLE)
+
+
+def time_program_and():
+    PROGRAM.match(SINGLE)
+
+
+def time_program_wide_or():
+    PROGRAM_WIDE.match(SINGLE)
+
+
+def time_lower_wide():
+    WIDE.to_program()
@@ -0,0 +1,25 @@
+from ldap_filter import Filter
+
+# Built up front so that only the nodes are counted.
+VALUES = ['user{}'.format(i) for i in range(10000)]
+POLICIES = [
+    '(&(objectClass=person)(|(department=dept{0})(manager=uid=boss{0},ou=people))'
+    '(!(status=terminated))(mail=*@example.com))'.format(i)
+    for i in range(1000)
+]
+
+
+def mem_leaf_10000():
+    return [Filter('uid', '=', value) for value in VALUES]
+
+
+def mem_group_10000():
+    return [Filter.AND([]) for _ in VALUES]
+
+
+def mem_parse_policies_1000():
+    return [Filter.parse(policy) for policy in POLICIES]
+
+
+def mem_freeze_policies_1000():
+    return [Filter.parse(policy).freeze() for policy in POLICIES]
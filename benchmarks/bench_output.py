@@ -0,0 +1,31 @@
+from ldap_filter import Filter
+
+TYPICAL = Filter.parse('(&(objectClass=person)(|(department=accounting)(department=sales))(!(status=terminated))(mail=*@example.com))')
+DEEP = Filter.parse('(&(a=0)' * 50 + ')' * 50)
+WIDE = Filter.parse('(|' + ''.join('(uid=user{})'.format(i) for i in range(1000)) + ')')
+NESTED = '(&(&(|(a=1))(&(b=2)))(|(&(c=3)))(!(d=4)))'
+
+
+def time_to_string():
+    TYPICAL.to_string()
+
+
+def time_to_string_indented():
+    TYPICAL.to_string(indent=4)
+
+
+def time_to_string_deep():
+    DEEP.to_string()
+
+
+def time_to_string_wide():
+    WIDE.to_string()
+
+
+def time_to_string_wide_indented():
+    WIDE.to_string(indent=2)
+
+
+def time_simplify():
+    # simplify() rewrites the tree in place, so start from a fresh parse.
+    Filter.parse(NESTED).simplify()
@@ -0,0 +1,116 @@
+from ldap_filter import Filter, ber, codec
+from ldap_filter.cache import ParseCache
+from ldap_filter.filter import _strip_whitespace
+
+SMALL = '(&(objectClass=person)(uid=jdoe))'
+TYPICAL = '(&(objectClass=person)(|(department=accounting)(department=sales))(!(status=terminated))(mail=*@example.com))'
+DEEP = '(&(a=0)' * 50 + ')' * 50
+WIDE = '(|' + ''.join('(uid=user{})'.format(i) for i in range(1000)) + ')'
+ESCAPED = '(&(cn=*\\28test\\29*)(description=\\5c\\2a\\00 value)(sn=Jos\\c3\\a9))'
+INDENTED = Filter.parse(TYPICAL).to_string(indent=4)
+ENCODED_TYPICAL = codec.dumps(Filter.parse(TYPICAL))
+ENCODED_WIDE = codec.dumps(Filter.parse(WIDE))
+TREE_TYPICAL = Filter.parse(TYPICAL)
+CACHE = ParseCache()
+CACHE.parse(TYPICAL, Filter.parse)
+CACHE.parse(WIDE, Filter.parse)
+TYPICAL_BYTES = TYPICAL.encode('utf-8')
+BER_TYPICAL = ber.encode(TREE_TYPICAL)
+BER_WIDE = ber.encode(Filter.parse(WIDE))
+
+
+def wide_indented(size):
+    return Filter.parse('(|' + ''.join('(cn=user {})'.format(i) for i in range(size)) + ')').to_string(indent=2)
+
+
+# Whitespace stripping should scale linearly: each step is ten times larger.
+WIDE_INDENTED_100 = wide_indented(100)
+WIDE_INDENTED_1000 = wide_indented(1000)
+WIDE_INDENTED_10000 = wide_indented(10000)
+
+
+def time_parse_small():
+    Filter.parse(SMALL)
+
+
+def time_parse_typical():
+    Filter.parse(TYPICAL)
+
+
+def time_parse_typical_bytes():
+    Filter.parse(TYPICAL_BYTES)
+
+
+# A cache hit copies the cached tree and must stay well under a parse.
+def time_parse_cached_typical():
+    CACHE.parse(TYPICAL, Filter.parse)
+
+
+def time_parse_cached_wide():
+    CACHE.parse(WIDE, Filter.parse)
+
+
+def time_parse_deep():
+    Filter.parse(DEEP)
+
+
+def time_parse_wide():
+    Filter.parse(WIDE)
+
+
+def time_parse_escaped():
+    Filter.parse(ESCAPED)
+
+
+def time_parse_indented():
+    Filter.parse(INDENTED)
+
+
+def time_strip_whitespace_none():
+    _strip_whitespace(WIDE)
+
+
+def time_strip_whitespace_100():
+    _strip_whitespace(WIDE_INDENTED_100)
+
+
+def time_strip_whitespace_1000():
+    _strip_whitespace(WIDE_INDENTED_1000)
+
+
+def time_strip_whitespace_10000():
+    _strip_whitespace(WIDE_INDENTED_10000)
+
+
+def time_parse_wide_indented():
+    Filter.parse(WIDE_INDENTED_1000)
+
+
+def time_encode_typical():
+    codec.dumps(Filter.parse(TYPICAL))
+
+
+def time_decode_typical():
+    codec.loads(ENCODED_TYPICAL)
+
+
+def time_decode_wide():
+    codec.loads(ENCODED_WIDE)
+
+
+# A proxy receiving BER: decode and encode directly, against going through
+# the string form with parse() and to_string().
+def time_ber_decode_typical():
+    ber.decode(BER_TYPICAL)
+
+
+def time_ber_decode_wide():
+    ber.decode(BER_WIDE)
+
+
+def time_ber_encode_typical():
+    ber.encode(TREE_TYPICAL)
+
+
+def time_string_round_trip_typical():
+    Filter.parse(TREE_TYPICAL.to_string())
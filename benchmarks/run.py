@@ -0,0 +1,185 @@
+"""Run the benchmark suite and store the results as JSON.
+
+Every ``bench_*.py`` module in this directory is loaded and each of its
+``time_*`` functions is timed, asv style: the number of calls per sample is
+calibrated to take at least ``--min-time`` seconds, then ``--repeat`` samples
+are taken and the per-call minimum, median and mean are recorded. Each
+``mem_*`` function returns an object and the memory allocated while building
+it is recorded with ``tracemalloc``.
+
+    python benchmarks/run.py -o results/1.0.1.json
+    python benchmarks/run.py -k match --compare results/1.0.1.json
+"""
+
+import argparse
+import datetime
+import fnmatch
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the ldap-filter benchmarks.')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('-k', '--select', action='append', default=[],
+                        help='only run benchmarks whose name contains this string or matches this glob')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of samples per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.1, help='minimum duration of a sample in seconds')
+    parser.add_argument('--compare', help='print the change against an earlier results file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(HERE))
+    results = {}
+
+    for name, func in discover():
+        if args.select and not any(s in name or fnmatch.fnmatch(name, s) for s in args.select):
+            continue
+
+        if name.split('.')[-1].startswith('mem_'):
+            results[name] = measure_memory(func)
+        else:
+            results[name] = measure(func, args.repeat, args.min_time)
+
+        print('{:<50} {:>12}'.format(name, format_result(results[name])))
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(args.output, 'w') as f:
+            json.dump(report(results), f, indent=2, sort_keys=True)
+
+    return 0
+
+
+def discover():
+    for filename in sorted(os.listdir(HERE)):
+        if not (filename.startswith('bench_') and filename.endswith('.py')):
+            continue
+
+        module_name = filename[:-3]
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(HERE, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        for attr in sorted(dir(module)):
+            if attr.startswith(('time_', 'mem_')):
+                yield '{}.{}'.format(module_name, attr), getattr(module, attr)
+
+
+def measure(func, repeat, min_time):
+    timer = timeit.Timer(func)
+    number = 1
+
+    # Calibrate the number of calls so a sample takes at least min_time.
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+
+    samples = [t / number for t in timer.repeat(repeat, number)]
+
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.mean(samples),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def measure_memory(func):
+    tracemalloc.start()
+
+    try:
+        obj = func()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    del obj
+
+    return {'bytes': size, 'min': size}
+
+
+def compare(results, path):
+    with open(path) as f:
+        previous = json.load(f)['results']
+
+    print('\n{:<50} {:>12} {:>12} {:>8}'.format('benchmark', 'before', 'after', 'ratio'))
+
+    for name, result in sorted(results.items()):
+        if name in previous:
+            before = previous[name]['min']
+            after = result['min']
+            print('{:<50} {:>12} {:>12} {:>8.2f}'.format(name, format_result(previous[name]), format_result(result),
+                                                           after / before))
+
+
+def report(results):
+    return {
+        'version': package_version(),
+        'commit': git_commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def package_version():
+    try:
+        from importlib.metadata import version
+        return version('ldap-filter')
+    except Exception:
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=HERE, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_result(result):
+    if 'bytes' in result:
+        return format_size(result['bytes'])
+
+    return format_time(result['min'])
+
+
+def format_size(size):
+    for unit, scale in (('MB', 1 << 20), ('kB', 1 << 10)):
+        if size >= scale:
+            return '{:.2f} {}'.format(size / scale, unit)
+
+    return '{} B'.format(size)
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.2f} {}'.format(seconds / scale, unit)
+
+    return '{:.2f} ns'.format(seconds / 1e-9)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,5 @@
 from .filter import Filter
 from .parser import ParseError
+from .index import EntryIndex
+from .filterset import FilterSet
+from .program import Program
@@ -0,0 +1,262 @@
+"""Approximate matchers for ``~=`` filters.
+
+A matcher compares an attribute value with the filter operand. Matchers
+with a ``key`` function match when both sides have the same key, which lets
+``compile`` compute the operand's key once and ``EntryIndex`` look entries up
+by key. An empty key, as for a value without letters, matches nothing.
+Matchers without one are compared pairwise.
+
+The matcher used for a filter is its ``matcher`` attribute, or
+``Filter.approx_matcher`` when that is not set. Either may be the name of a
+registered matcher or a matcher object.
+"""
+
+import re
+
+from ldap_filter.soundex import soundex, soundex_compare
+
+
+class ApproxMatcher:
+    keyed = True
+
+    def key(self, value):
+        raise NotImplementedError
+
+    def match(self, value, operand):
+        key = self.key(value)
+
+        return bool(key) and key == self.key(operand)
+
+
+class Soundex(ApproxMatcher):
+    def key(self, value):
+        return soundex(value)
+
+    def match(self, value, operand):
+        return soundex_compare(value, operand)
+
+
+class Metaphone(ApproxMatcher):
+    def key(self, value):
+        return metaphone(value)
+
+
+class Nysiis(ApproxMatcher):
+    def key(self, value):
+        return nysiis(value)
+
+
+class EditDistance(ApproxMatcher):
+    """Case-insensitive Levenshtein distance, normalized by the length of
+    the longer string, of at most ``threshold``."""
+
+    keyed = False
+
+    def __init__(self, threshold=0.25):
+        self.threshold = threshold
+
+    def key(self, value):
+        return None
+
+    def match(self, value, operand):
+        value = value.lower()
+        operand = operand.lower()
+        longest = max(len(value), len(operand))
+
+        return edit_distance(value, operand) <= self.threshold * longest
+
+
+MATCHERS = {
+    'soundex': Soundex(),
+    'metaphone': Metaphone(),
+    'nysiis': Nysiis(),
+    'edit_distance': EditDistance(),
+}
+
+
+def register(name, matcher):
+    MATCHERS[name] = matcher
+
+
+def get(matcher):
+    if isinstance(matcher, str):
+        try:
+            return MATCHERS[matcher]
+        except KeyError:
+            raise ValueError('Unknown approximate matcher: {}'.format(matcher))
+
+    return matcher
+
+
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        current = [i]
+
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+
+        previous = current
+
+    return previous[-1]
+
+
+_LETTERS = re.compile(r'[^A-Z]+')
+_VOWELS = frozenset('AEIOU')
+
+
+def metaphone(string):
+    word = _LETTERS.sub('', string.upper())
+
+    if word[:2] in ('AE', 'GN', 'KN', 'PN', 'WR'):
+        word = word[1:]
+    elif word[:2] == 'WH':
+        word = 'W' + word[2:]
+    elif word[:1] == 'X':
+        word = 'S' + word[1:]
+
+    code = []
+    size = len(word)
+
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i else ''
+        next1 = word[i + 1:i + 2]
+        next2 = word[i + 2:i + 3]
+
+        if c == prev and c != 'C':
+            continue
+
+        if c in _VOWELS:
+            if i == 0:
+                code.append(c)
+        elif c == 'B':
+            if not (prev == 'M' and i == size - 1):
+                code.append('B')
+        elif c == 'C':
+            if next1 == 'I' and next2 == 'A':
+                code.append('X')
+            elif next1 == 'H':
+                code.append('K' if prev == 'S' else 'X')
+            elif next1 in ('I', 'E', 'Y'):
+                if prev != 'S':
+                    code.append('S')
+            else:
+                code.append('K')
+        elif c == 'D':
+            code.append('J' if next1 == 'G' and next2 in ('E', 'I', 'Y') else 'T')
+        elif c == 'G':
+            if next1 == 'H' and next2 and next2 not in _VOWELS:
+                continue
+            elif next1 == 'N' and word[i + 1:] in ('N', 'NED'):
+                continue
+            elif prev == 'D' and next1 in ('E', 'I', 'Y'):
+                continue
+            elif next1 in ('I', 'E', 'Y') and prev != 'G':
+                code.append('J')
+            else:
+                code.append('K')
+        elif c == 'H':
+            if prev in ('C', 'S', 'P', 'T', 'G'):
+                continue
+            elif prev in _VOWELS and next1 not in _VOWELS:
+                continue
+
+            code.append('H')
+        elif c == 'K':
+            if prev != 'C':
+                code.append('K')
+        elif c == 'P':
+            code.append('F' if next1 == 'H' else 'P')
+        elif c == 'Q':
+            code.append('K')
+        elif c == 'S':
+            if next1 == 'H' or (next1 == 'I' and next2 in ('O', 'A')):
+                code.append('X')
+            else:
+                code.append('S')
+        elif c == 'T':
+            if next1 == 'I' and next2 in ('O', 'A'):
+                code.append('X')
+            elif next1 == 'H':
+                code.append('0')
+            elif not (next1 == 'C' and next2 == 'H'):
+                code.append('T')
+        elif c == 'V':
+            code.append('F')
+        elif c in ('W', 'Y'):
+            if next1 in _VOWELS:
+                code.append(c)
+        elif c == 'X':
+            code.append('KS')
+        elif c == 'Z':
+            code.append('S')
+        else:
+            code.append(c)
+
+    return ''.join(code)
+
+
+_NYSIIS_PREFIXES = (('MAC', 'MCC'), ('KN', 'NN'), ('K', 'C'), ('PH', 'FF'), ('PF', 'FF'), ('SCH', 'SSS'))
+_NYSIIS_SUFFIXES = (('EE', 'Y'), ('IE', 'Y'), ('DT', 'D'), ('RT', 'D'), ('RD', 'D'), ('NT', 'D'), ('ND', 'D'))
+
+
+def nysiis(string):
+    word = _LETTERS.sub('', string.upper())
+
+    if not word:
+        return ''
+
+    for prefix, replacement in _NYSIIS_PREFIXES:
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix):]
+            break
+
+    for suffix, replacement in _NYSIIS_SUFFIXES:
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+
+    chars = list(word)
+    code = [chars[0]]
+
+    for i in range(1, len(chars)):
+        c = chars[i]
+
+        if c == 'E' and chars[i + 1:i + 2] == ['V']:
+            chars[i:i + 2] = ['A', 'F']
+        elif c in _VOWELS:
+            chars[i] = 'A'
+        elif c == 'Q':
+            chars[i] = 'G'
+        elif c == 'Z':
+            chars[i] = 'S'
+        elif c == 'M':
+            chars[i] = 'N'
+        elif c == 'K':
+            chars[i] = 'N' if chars[i + 1:i + 2] == ['N'] else 'C'
+        elif c == 'S' and chars[i + 1:i + 3] == ['C', 'H']:
+            chars[i:i + 3] = ['S', 'S', 'S']
+        elif c == 'P' and chars[i + 1:i + 2] == ['H']:
+            chars[i:i + 2] = ['F', 'F']
+        elif c == 'H' and (chars[i - 1] not in _VOWELS or chars[i + 1:i + 2] not in (['A'], ['E'], ['I'], ['O'], ['U'])):
+            chars[i] = chars[i - 1]
+        elif c == 'W' and chars[i - 1] in _VOWELS:
+            chars[i] = chars[i - 1]
+
+        if chars[i] != code[-1]:
+            code.append(chars[i])
+
+    if len(code) > 1 and code[-1] == 'S':
+        code.pop()
+
+    if code[-2:] == ['A', 'Y']:
+        code[-2:] = ['Y']
+
+    if len(code) > 1 and code[-1] == 'A':
+        code.pop()
+
+    return ''.join(code)
@@ -0,0 +1,305 @@
+"""BER encoding of filters, the ``Filter`` CHOICE of RFC 4511 section 4.5.1.
+
+``encode`` turns a filter tree into the bytes of an LDAP search request
+filter and ``decode`` reads them back, without going through the string
+form. Both walk the tree with an explicit stack.
+
+In a tree value ``*`` separates substrings and ``\\XX`` is an escaped
+octet; other characters stand for themselves. Encoding turns values into
+the octets on the wire. Decoding gives the form ``Filter.parse`` gives for
+the same filter (see ``parser.decode_value``): ``(``, ``)``, ``*``, ``\\``,
+NUL and octets that are not UTF-8 are escaped, so every value survives a
+round trip and converts to a string filter of the same structure.
+
+Trees map onto the CHOICE as follows:
+
+- ``(attr=*)`` is present, ``(attr=a*b)`` is substrings and other ``=``
+  tests are equalityMatch; ``>=``, ``<=`` and ``~=`` are greaterOrEqual,
+  lessOrEqual and approxMatch.
+- An extensible match is a test with the ``:=`` operator whose attribute
+  is ``type[:dn][:rule]``, as in ``(cn:dn:caseExactMatch:=Fred)``.
+- A NOT with several children is encoded as not(or(...)), which matches
+  the same entries. Empty AND and OR groups are encoded as empty sets, the
+  absolute true and false filters of RFC 4526.
+"""
+
+import ldap_filter.parser as parser
+from ldap_filter.filter import Filter, GroupAnd, GroupNot, GroupOr
+
+AND = 0xa0
+OR = 0xa1
+NOT = 0xa2
+EQUALITY = 0xa3
+SUBSTRINGS = 0xa4
+GREATER_OR_EQUAL = 0xa5
+LESS_OR_EQUAL = 0xa6
+PRESENT = 0x87
+APPROX = 0xa8
+EXTENSIBLE = 0xa9
+
+_OCTET_STRING = 0x04
+_SEQUENCE = 0x30
+_BOOLEAN_TRUE = b'\x84\x01\xff'
+
+_AVAS = {'=': EQUALITY, '>=': GREATER_OR_EQUAL, '<=': LESS_OR_EQUAL, '~=': APPROX}
+_COMPS = {tag: comp for comp, tag in _AVAS.items()}
+_GROUPS = {'&': AND, '|': OR}
+
+
+class BERError(ValueError):
+    pass
+
+
+def encode(filt):
+    # Children are encoded before their group, which then wraps them.
+    done = []
+    stack = [(filt, False)]
+
+    while stack:
+        node, wrap = stack.pop()
+
+        if node.type == 'filter':
+            done.append(_encode_test(node))
+        elif wrap:
+            count = len(node.filters or ())
+            content = b''.join(done[len(done) - count:]) if count else b''
+            del done[len(done) - count:]
+
+            if node.comp == '!':
+                if count != 1:
+                    content = _tlv(OR, content)
+                done.append(_tlv(NOT, content))
+            else:
+                done.append(_tlv(_GROUPS[node.comp], content))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.filters or ()))
+
+    return done[0]
+
+
+def decode(data, offset=0):
+    """Decode the filter at ``offset`` of ``data``, a bytes-like object, and
+    return it with the offset after it."""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+
+    # Open groups, each [tag, children, end offset].
+    stack = []
+
+    try:
+        while True:
+            tag = data[offset]
+            start, end = _header(data, offset + 1)
+
+            if end > len(data) or (stack and end > stack[-1][2]):
+                raise BERError('Element at offset {} overruns its container'.format(offset))
+
+            if tag == AND or tag == OR or tag == NOT:
+                children = []
+                node = GroupAnd(children) if tag == AND else GroupOr(children) if tag == OR else GroupNot(children)
+
+                if stack:
+                    stack[-1][1].append(node)
+
+                stack.append([tag, children, end, node])
+                offset = start
+
+                if start < end:
+                    continue
+            else:
+                node = _decode_test(tag, data, start, end, offset)
+                offset = end
+
+                if not stack:
+                    return node, offset
+
+                stack[-1][1].append(node)
+
+            while stack and offset == stack[-1][2]:
+                group = stack.pop()
+
+                if group[0] == NOT and len(group[1]) != 1:
+                    raise BERError('NOT must contain exactly one filter')
+
+                if not stack:
+                    return group[3], offset
+    except IndexError:
+        raise BERError('Truncated filter at offset {}'.format(offset))
+
+
+def _encode_test(node):
+    attr = node.attr.encode('utf-8')
+    comp = node.comp
+    val = node.val
+
+    if comp == '=' and val == '*':
+        return _tlv(PRESENT, attr)
+    elif comp == '=' and '*' in val:
+        pieces = val.split('*')
+        items = []
+
+        if pieces[0]:
+            items.append(_tlv(0x80, _octets(pieces[0])))
+
+        items.extend(_tlv(0x81, _octets(piece)) for piece in pieces[1:-1] if piece)
+
+        if pieces[-1]:
+            items.append(_tlv(0x82, _octets(pieces[-1])))
+
+        return _tlv(SUBSTRINGS, _tlv(_OCTET_STRING, attr) + _tlv(_SEQUENCE, b''.join(items)))
+    elif comp in _AVAS:
+        return _tlv(_AVAS[comp], _tlv(_OCTET_STRING, attr) + _tlv(_OCTET_STRING, _octets(val)))
+    elif comp == ':=':
+        parts = node.attr.split(':')
+        items = []
+        dn = False
+
+        for part in parts[1:]:
+            if part.lower() == 'dn':
+                dn = True
+            elif part:
+                items.append(_tlv(0x81, part.encode('utf-8')))
+
+        if parts[0]:
+            items.append(_tlv(0x82, parts[0].encode('utf-8')))
+
+        items.append(_tlv(0x83, _octets(val)))
+
+        if dn:
+            items.append(_BOOLEAN_TRUE)
+
+        return _tlv(EXTENSIBLE, b''.join(items))
+
+    raise BERError('Cannot encode the {!r} operator'.format(comp))
+
+
+def _decode_test(tag, data, start, end, offset):
+    if tag == PRESENT:
+        return Filter(_text(data[start:end]), '=', '*')
+
+    items = list(_elements(data, start, end))
+
+    if tag in _COMPS:
+        if len(items) != 2 or items[0][0] != _OCTET_STRING or items[1][0] != _OCTET_STRING:
+            raise BERError('Invalid attribute value assertion at offset {}'.format(offset))
+
+        return Filter(_text(items[0][1]), _COMPS[tag], parser.escape_octets(items[1][1]))
+    elif tag == SUBSTRINGS:
+        if len(items) != 2 or items[0][0] != _OCTET_STRING or items[1][0] != _SEQUENCE:
+            raise BERError('Invalid substring filter at offset {}'.format(offset))
+
+        initial = final = ''
+        middle = []
+        position = 0
+
+        for kind, octets in _elements(items[1][1], 0, len(items[1][1])):
+            # At most one initial, then any, then at most one final.
+            if not 0x80 <= kind <= 0x82 or kind < position or (kind == position and kind != 0x81):
+                raise BERError('Invalid substring at offset {}'.format(offset))
+
+            position = kind
+
+            if kind == 0x80:
+                initial = parser.escape_octets(octets)
+            elif kind == 0x81:
+                middle.append(parser.escape_octets(octets))
+            else:
+                final = parser.escape_octets(octets)
+
+        if not position:
+            raise BERError('Empty substring filter at offset {}'.format(offset))
+
+        return Filter(_text(items[0][1]), '=', '*'.join([initial] + middle + [final]))
+    elif tag == EXTENSIBLE:
+        attr = ''
+        rule = ''
+        value = None
+        dn = False
+
+        for kind, octets in items:
+            if kind == 0x81:
+                rule = _text(octets)
+            elif kind == 0x82:
+                attr = _text(octets)
+            elif kind == 0x83:
+                value = parser.escape_octets(octets)
+            elif kind == 0x84:
+                dn = octets != b'\x00'
+            else:
+                raise BERError('Invalid matching rule assertion at offset {}'.format(offset))
+
+        if value is None:
+            raise BERError('Matching rule assertion without a value at offset {}'.format(offset))
+
+        # Both end up in the attribute, ``type[:dn][:rule]``.
+        if ':' in attr or ':' in rule:
+            raise BERError('Invalid matching rule assertion at offset {}'.format(offset))
+
+        return Filter(attr + (':dn' if dn else '') + (':' + rule if rule else ''), ':=', value)
+
+    raise BERError('Unknown filter tag 0x{:02x} at offset {}'.format(tag, offset))
+
+
+def _header(data, offset):
+    length = data[offset]
+    offset += 1
+
+    if length & 0x80:
+        size = length & 0x7f
+
+        if not size or size > 4:
+            raise BERError('Unsupported length encoding at offset {}'.format(offset - 1))
+
+        length = int.from_bytes(data[offset:offset + size], 'big')
+        offset += size
+
+    return offset, offset + length
+
+
+def _elements(data, start, end):
+    while start < end:
+        tag = data[start]
+        content, stop = _header(data, start + 1)
+
+        if stop > end:
+            raise BERError('Element at offset {} overruns its container'.format(start))
+
+        yield tag, data[content:stop]
+        start = stop
+
+
+def _tlv(tag, content):
+    length = len(content)
+
+    if length < 0x80:
+        return bytes((tag, length)) + content
+
+    size = (length.bit_length() + 7) // 8
+
+    return bytes((tag, 0x80 | size)) + length.to_bytes(size, 'big') + content
+
+
+def _octets(value):
+    if '\\' not in value:
+        return value.encode('utf-8', 'surrogatepass')
+
+    out = bytearray()
+    position = 0
+
+    for match in parser.ESCAPED.finditer(value):
+        out += value[position:match.start()].encode('utf-8', 'surrogatepass')
+        out += bytes.fromhex(match.group(0).replace('\\', ''))
+        position = match.end()
+
+    out += value[position:].encode('utf-8', 'surrogatepass')
+
+    return bytes(out)
+
+
+def _text(octets):
+    try:
+        return octets.decode('utf-8')
+    except UnicodeDecodeError:
+        raise BERError('Attribute descriptions must be UTF-8')
+
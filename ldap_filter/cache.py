@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parsed filters keyed on the raw filter string.
+
+    Cached trees are never handed out directly; every hit returns a copy of
+    the nodes so callers are free to mutate the result (e.g. with
+    ``simplify()``). Only the nodes and child lists are copied, the strings
+    are shared, which is many times faster than parsing again.
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            try:
+                tree = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+        return _copy_tree(tree)
+
+    def put(self, key, tree):
+        tree = _copy_tree(tree)
+
+        with self._lock:
+            self._data[key] = tree
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def parse(self, key, parse):
+        tree = self.get(key)
+
+        if tree is None:
+            tree = parse(key)
+            self.put(key, tree)
+
+        return tree
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
+
+
+def _copy_tree(tree):
+    root = _copy_node(tree)
+    stack = [(tree, root)]
+
+    while stack:
+        node, copied = stack.pop()
+
+        if node.type == 'filter' or node.filters is None:
+            continue
+
+        copied.filters = [_copy_node(child) for child in node.filters]
+        stack.extend(zip(node.filters, copied.filters))
+
+    return root
+
+
+def _copy_node(node):
+    copied = object.__new__(type(node))
+
+    if node.type == 'filter':
+        copied.attr = node.attr
+        copied.comp = node.comp
+        copied.val = node.val
+        copied.matcher = node.matcher
+    else:
+        copied.comp = node.comp
+        copied.filters = node.filters
+
+    return copied
@@ -0,0 +1,202 @@
+"""Command-line tool for matching LDIF and JSON Lines entries.
+
+    ldap-filter '(&(objectClass=person)(mail=*))' people.ldif
+    zcat dump.jsonl.gz | ldap-filter --count '(uid=a*)'
+
+The exit status is 0 when at least one entry matched, 1 when none did and 2
+on errors, like grep.
+
+JSON numbers and booleans are matched as strings, the way LDAP returns
+them, and null values are left out. Matching JSON Lines entries are written
+as the lines they were read from, so the output is the input unchanged.
+"""
+
+import argparse
+import base64
+import io
+import itertools
+import json
+import sys
+
+from ldap_filter.filter import Filter
+from ldap_filter.ldif import LDIFError, read_ldif, write_ldif
+from ldap_filter.parser import ParseError
+
+
+def main(argv=None, stdin=None, stdout=None):
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout
+    args = _arguments().parse_args(argv)
+
+    try:
+        filt = Filter.parse(args.filter)
+    except ParseError as e:
+        sys.stderr.write('ldap-filter: invalid filter\n{}\n'.format(e))
+        return 2
+
+    try:
+        sources = []
+
+        for source in args.files or ['-']:
+            if source == '-':
+                source = _peekable(stdin)
+
+            sources.append(_detect(args.format, source))
+
+        entries = itertools.chain.from_iterable(_read(fmt, source) for fmt, source in sources)
+        matches = _match(filt, entries, args)
+
+        if args.count:
+            count = sum(1 for _ in matches)
+            stdout.write('{}\n'.format(count))
+        else:
+            count = _write(matches, args.output or sources[0][0], stdout)
+    except (OSError, LDIFError, ValueError) as e:
+        sys.stderr.write('ldap-filter: {}\n'.format(e))
+        return 2
+
+    return 0 if count else 1
+
+
+def _arguments():
+    parser = argparse.ArgumentParser(prog='ldap-filter', description='Print the entries that match an LDAP filter.')
+    parser.add_argument('filter', help='RFC 4515 filter string')
+    parser.add_argument('files', nargs='*', help='LDIF or JSON Lines files, - or nothing for stdin')
+    parser.add_argument('-f', '--format', choices=('auto', 'ldif', 'jsonl'), default='auto',
+                        help='input format, detected from the file name or content by default')
+    parser.add_argument('-o', '--output', choices=('ldif', 'jsonl', 'dn'),
+                        help='output format, the input format by default')
+    parser.add_argument('-c', '--count', action='store_true', help='print the number of matching entries only')
+    parser.add_argument('-v', '--invert-match', action='store_true', help='select entries that do not match')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=1000, help='entries sent to a worker at a time')
+
+    return parser
+
+
+def _detect(fmt, source):
+    if fmt != 'auto':
+        return fmt, source
+
+    if isinstance(source, str):
+        if source.endswith(('.jsonl', '.ndjson', '.json')):
+            return 'jsonl', source
+        elif source.endswith('.ldif'):
+            return 'ldif', source
+
+        with open(source, 'rb') as f:
+            head = f.read(4096)
+    else:
+        head = source.peek(4096)
+
+    # JSON Lines entries are objects, LDIF starts with a comment or attribute.
+    return ('jsonl' if head.lstrip()[:1] == b'{' else 'ldif'), source
+
+
+def _peekable(stream):
+    return stream if hasattr(stream, 'peek') else io.BufferedReader(stream)
+
+
+def _read(fmt, source):
+    # Entries come with the line they were read from, None for LDIF.
+    if fmt == 'ldif':
+        for entry in read_ldif(source):
+            yield entry, None
+    elif isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from _read_jsonl(f)
+    else:
+        yield from _read_jsonl(source)
+
+
+def _read_jsonl(stream):
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                entry = json.loads(line, parse_int=str, parse_float=str)
+            except ValueError as e:
+                raise ValueError('line {}: {}'.format(line_no, e))
+
+            if not isinstance(entry, dict):
+                raise ValueError('line {}: expected a JSON object'.format(line_no))
+
+            yield _json_entry(entry), line.decode('utf-8').rstrip('\r\n')
+
+
+def _json_entry(entry):
+    for attr, value in list(entry.items()):
+        if isinstance(value, list):
+            entry[attr] = [_json_scalar(v) for v in value if v is not None]
+        elif value is None:
+            del entry[attr]
+        else:
+            entry[attr] = _json_scalar(value)
+
+    return entry
+
+
+def _json_scalar(value):
+    # Booleans in the LDAP syntax, numbers were kept as their JSON text.
+    if value is True:
+        return 'TRUE'
+    elif value is False:
+        return 'FALSE'
+
+    return value
+
+
+def _match(filt, entries, args):
+    invert = args.invert_match
+
+    if args.workers > 1:
+        entries, records = itertools.tee(entries)
+        records = (entry for entry, line in records)
+        results = filt.match_parallel(records, workers=args.workers, chunksize=args.chunksize)
+
+        try:
+            for (entry, line), matched in zip(entries, results):
+                if matched != invert:
+                    yield entry, line
+        except (AttributeError, TypeError) as e:
+            raise ValueError('cannot match an entry: {}'.format(e))
+    else:
+        predicate = filt.compile()
+
+        for entry, line in entries:
+            try:
+                matched = bool(predicate(entry))
+            except (AttributeError, TypeError) as e:
+                raise ValueError('cannot match {}: {}'.format(entry.get('dn', 'an entry'), e))
+
+            if matched != invert:
+                yield entry, line
+
+
+def _write(entries, fmt, stdout):
+    count = 0
+
+    if fmt == 'ldif':
+        for entry, line in entries:
+            write_ldif([entry], stdout)
+            count += 1
+    elif fmt == 'jsonl':
+        for entry, line in entries:
+            if line is None:
+                line = json.dumps(entry, ensure_ascii=False, default=_json_default)
+
+            stdout.write(line)
+            stdout.write('\n')
+            count += 1
+    else:
+        for entry, line in entries:
+            stdout.write('{}\n'.format(entry.get('dn', '')))
+            count += 1
+
+    return count
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+
+    raise TypeError('{!r} is not JSON serializable'.format(value))
@@ -0,0 +1,294 @@
+"""Compact binary encoding of filter trees.
+
+``dumps`` turns a filter into bytes and ``loads`` turns them back into a
+new, mutable tree without running the parser. The encoding starts with a
+magic number, a format version and a CRC-32 of the body, so stale or
+damaged data is rejected with a ``CodecError`` instead of being misread.
+
+The body has three parts:
+
+- the distinct strings of the filter as one UTF-8 blob, joined with a
+  separator character that none of them contains, so that the table is
+  decoded and split with two calls;
+- the tests, as columns of string table indexes for the attributes, the
+  operators, the values and, when any test has one, the approximate
+  matchers;
+- the shape of the tree in preorder, a tag per node with the number of
+  children after a group tag. Tests are taken from the columns in order.
+
+Numbers are unsigned LEB128 varints, column entries are little-endian and
+1, 2 or 4 bytes wide. Approximate matchers are stored by their registered
+name; a filter using a matcher object cannot be encoded.
+
+``encode`` and ``decode`` work on the bare body, for containers such as
+``DiskCache`` that checksum their records themselves.
+"""
+
+import struct
+import sys
+import zlib
+
+from array import array
+
+from ldap_filter.filter import Filter, GroupAnd, GroupNot, GroupOr
+
+MAGIC = b'LDFT'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHI')
+
+_AND = 0
+_OR = 1
+_NOT = 2
+_TEST = 3
+_TAGS = {'&': _AND, '|': _OR, '!': _NOT}
+_GROUPS = (GroupAnd, GroupOr, GroupNot)
+_WIDTHS = {1: None, 2: 'H', 4: 'I'}
+
+
+class CodecError(ValueError):
+    pass
+
+
+def dumps(filt):
+    body = encode(filt)
+
+    return _HEADER.pack(MAGIC, VERSION, zlib.crc32(body)) + body
+
+
+def loads(data):
+    data = bytes(data)
+
+    if len(data) < _HEADER.size:
+        raise CodecError('Truncated filter data')
+
+    magic, version, crc = _HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise CodecError('Not encoded filter data')
+    if version != VERSION:
+        raise CodecError('Unsupported filter encoding version {}'.format(version))
+
+    body = data[_HEADER.size:]
+
+    if zlib.crc32(body) != crc:
+        raise CodecError('Filter data checksum mismatch')
+
+    filt, end = decode(body)
+
+    if end != len(body):
+        raise CodecError('Trailing data after the filter')
+
+    return filt
+
+
+def encode(filt):
+    strings = {}
+    columns = ([], [], [], [])
+    shape = bytearray()
+    stack = [filt]
+
+    while stack:
+        node = stack.pop()
+
+        if node.type == 'filter':
+            matcher = node.matcher
+
+            if matcher is not None and not isinstance(matcher, str):
+                raise CodecError('Cannot encode approximate matcher {!r}, use a registered name'.format(matcher))
+
+            shape.append(_TEST)
+
+            for column, value in zip(columns, (node.attr, node.comp, node.val)):
+                column.append(strings.setdefault(value, len(strings)))
+
+            # Matchers are stored off by one, zero is no matcher.
+            columns[3].append(0 if matcher is None else strings.setdefault(matcher, len(strings)) + 1)
+        else:
+            children = node.filters or ()
+            shape.append(_TAGS[node.comp])
+            _put_varint(shape, len(children))
+            stack.extend(reversed(children))
+
+    separator = 0
+
+    while any(chr(separator) in value for value in strings):
+        separator += 1
+
+    blob = chr(separator).join(strings).encode('utf-8', 'surrogatepass')
+    out = bytearray()
+    _put_varint(out, len(strings))
+    _put_varint(out, separator)
+    _put_varint(out, len(blob))
+    out += blob
+
+    width = 1 if len(strings) < 0xff else 2 if len(strings) < 0xffff else 4
+    matchers = any(columns[3])
+    _put_varint(out, len(columns[0]))
+    out.append(width | matchers << 7)
+
+    for column in columns[:4 if matchers else 3]:
+        out += _pack(column, width)
+
+    out += shape
+
+    return bytes(out)
+
+
+def decode(data, offset=0):
+    """Decode the tree at ``offset`` and return it with the offset after it."""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+
+    try:
+        strings, offset = _get_strings(data, offset)
+        leaves, offset = _get_leaves(data, offset, strings)
+        return _get_shape(data, offset, leaves)
+    except CodecError:
+        raise
+    except (IndexError, ValueError, StopIteration, UnicodeDecodeError):
+        raise CodecError('Truncated or damaged filter data')
+
+
+def _get_strings(data, offset):
+    count, offset = _get_varint(data, offset)
+    separator, offset = _get_varint(data, offset)
+    size, offset = _get_varint(data, offset)
+    end = offset + size
+
+    if end > len(data):
+        raise IndexError
+
+    strings = data[offset:end].decode('utf-8', 'surrogatepass').split(chr(separator)) if count else []
+
+    if len(strings) != count:
+        raise IndexError
+
+    return strings, end
+
+
+def _get_leaves(data, offset, strings):
+    count, offset = _get_varint(data, offset)
+    flags = data[offset]
+    offset += 1
+    width = flags & 0x7f
+
+    if width not in _WIDTHS:
+        raise CodecError('Invalid column width {}'.format(width))
+
+    columns = []
+
+    for _ in range(4 if flags & 0x80 else 3):
+        end = offset + count * width
+
+        if end > len(data):
+            raise IndexError
+
+        columns.append(_unpack(data[offset:end], width))
+        offset = end
+
+    # Attribute names and operators repeat across filters, share them.
+    get = strings.__getitem__
+    attrs = map(sys.intern, map(get, columns[0]))
+    comps = map(sys.intern, map(get, columns[1]))
+    vals = map(get, columns[2])
+
+    if len(columns) == 3:
+        return list(map(Filter, attrs, comps, vals)), offset
+
+    matchers = [strings[i - 1] if i else None for i in columns[3]]
+
+    return list(map(Filter, attrs, comps, vals, matchers)), offset
+
+
+def _get_shape(data, offset, leaves):
+    leaves = iter(leaves)
+    # Open groups, each [children, number still to read].
+    stack = []
+    root = None
+
+    while True:
+        tag = data[offset]
+        offset += 1
+
+        if tag == _TEST:
+            node = next(leaves)
+        else:
+            count = data[offset]
+
+            if count < 0x80:
+                offset += 1
+            else:
+                count, offset = _get_varint(data, offset)
+
+            children = []
+            node = _GROUPS[tag](children)
+
+            if count:
+                if stack:
+                    stack[-1][0].append(node)
+                    stack[-1][1] -= 1
+                else:
+                    root = node
+                stack.append([children, count])
+                continue
+
+        if not stack:
+            return node, offset
+
+        stack[-1][0].append(node)
+        stack[-1][1] -= 1
+
+        while stack and not stack[-1][1]:
+            stack.pop()
+
+        if not stack:
+            return root, offset
+
+
+def _pack(column, width):
+    if width == 1:
+        return bytes(column)
+
+    column = array(_WIDTHS[width], column)
+
+    if sys.byteorder == 'big':
+        column.byteswap()
+
+    return column.tobytes()
+
+
+def _unpack(data, width):
+    if width == 1:
+        return data
+
+    column = array(_WIDTHS[width])
+    column.frombytes(data)
+
+    if sys.byteorder == 'big':
+        column.byteswap()
+
+    return column
+
+
+def _put_varint(out, value):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+
+    out.append(value)
+
+
+def _get_varint(data, offset):
+    value = 0
+    shift = 0
+
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+
+        if byte < 0x80:
+            return value, offset
+
+        shift += 7
@@ -0,0 +1,152 @@
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from ldap_filter.filter import _compile_test, _to_int, Filter
+
+
+def match_columns(filt, table, length=None):
+    """Evaluate ``filt`` against a columnar table and return a boolean mask.
+
+    ``table`` maps attribute names to equal length NumPy arrays or lists.
+    Row ``i`` of the result is the same as ``filt.match()`` on a dictionary
+    built from row ``i`` of every column, where ``None`` (or NaN in a float
+    column) means the attribute is absent from that row.
+
+    Equality, presence and ordering tests on string and numeric columns are
+    evaluated as array operations. Other tests, and columns holding mixed
+    or multi-valued cells, fall back to a per-cell loop. Substring and
+    approximate tests on a numeric column compare the decimal form of each
+    cell, without a fraction for whole floats, as ``match()`` would on the
+    values as strings.
+    """
+    if np is None:
+        raise ImportError('match_columns requires numpy')
+
+    columns = {}
+
+    for attr, column in table.items():
+        column = _as_array(column)
+
+        if length is None:
+            length = len(column)
+        elif len(column) != length:
+            raise ValueError('Column {} has {} rows, expected {}'.format(attr, len(column), length))
+
+        columns[attr] = column
+
+    if length is None:
+        raise ValueError('Cannot determine the number of rows of an empty table')
+
+    return _evaluate(filt, columns, length, {})
+
+
+def _evaluate(filt, columns, length, lowered):
+    if filt.type == 'filter':
+        try:
+            column = columns[filt.attr]
+        except KeyError:
+            return np.zeros(length, dtype=bool)
+
+        return _evaluate_leaf(filt.attr, filt.comp, filt.val, filt.matcher, column, lowered)
+
+    masks = [_evaluate(f, columns, length, lowered) for f in filt.filters]
+
+    if filt.comp == '&':
+        return np.logical_and.reduce(masks) if masks else np.ones(length, dtype=bool)
+    elif filt.comp == '|':
+        return np.logical_or.reduce(masks) if masks else np.zeros(length, dtype=bool)
+    elif filt.comp == '!':
+        return ~np.logical_or.reduce(masks) if masks else np.ones(length, dtype=bool)
+
+    return np.zeros(length, dtype=bool)
+
+
+def _evaluate_leaf(attr, comp, val, matcher, column, lowered):
+    kind = column.dtype.kind
+
+    if kind in 'biuf':
+        present = ~np.isnan(column) if kind == 'f' else np.ones(len(column), dtype=bool)
+
+        if comp == '=' and val == '*':
+            return present
+        elif comp == '=' and '*' not in val:
+            number = _to_int(Filter.unescape(val))
+            if number is None:
+                return np.zeros(len(column), dtype=bool)
+
+            return present & (column == number)
+        elif comp in ('<=', '>='):
+            number = _to_int(val)
+            if number is not None:
+                op = operator.le if comp == '<=' else operator.ge
+                values = np.trunc(column) if kind == 'f' else column
+
+                return present & op(values, number)
+    elif kind == 'U':
+        if comp == '=' and val == '*':
+            return np.ones(len(column), dtype=bool)
+        elif comp == '=' and '*' not in val:
+            value = Filter.unescape(val).lower()
+
+            # Lowercasing is the expensive part, so do it once per column.
+            if attr not in lowered:
+                lowered[attr] = np.char.lower(column)
+
+            return (column != '') & (lowered[attr] == value)
+        elif comp in ('<=', '>=') and _to_int(val) is None:
+            op = operator.le if comp == '<=' else operator.ge
+
+            return op(column, val)
+
+    # String tests cannot be applied to numbers, so they see their digits.
+    numeric = kind in 'biuf' and comp not in ('<=', '>=')
+
+    return _evaluate_cells(comp, val, matcher, column, numeric)
+
+
+def _evaluate_cells(comp, val, matcher, column, numeric=False):
+    test = _compile_test(comp, val, matcher)
+    mask = np.zeros(len(column), dtype=bool)
+
+    for i, cell in enumerate(column.tolist()):
+        if cell is None or cell != cell:
+            continue
+
+        if numeric:
+            cell = _number_string(cell)
+
+        try:
+            mask[i] = test(cell)
+        except AttributeError:
+            pass
+
+    return mask
+
+
+def _number_string(number):
+    if isinstance(number, float) and number.is_integer():
+        return str(int(number))
+
+    return str(number)
+
+
+def _as_array(column):
+    if isinstance(column, np.ndarray) and column.ndim == 1:
+        return column
+
+    try:
+        array = np.asarray(column)
+    except ValueError:
+        array = None
+
+    if array is None or array.ndim != 1 or len(array) != len(column):
+        array = np.empty(len(column), dtype=object)
+
+        for i, cell in enumerate(column):
+            array[i] = cell
+
+    return array
@@ -0,0 +1,141 @@
+"""Cost model used to order the children of AND/OR groups.
+
+Every node gets an estimated evaluation cost and an estimated probability of
+matching. Children of an AND are ordered by ``cost / P(false)`` and children
+of an OR by ``cost / P(true)``, which is the order that minimises the expected
+cost of a short-circuiting evaluation of independent tests.
+"""
+
+LEAF_COST = {
+    'present': 1.0,
+    'equal': 2.0,
+    'ordering': 3.0,
+    'substring': 6.0,
+    'approx': 12.0,
+}
+
+LEAF_SELECTIVITY = {
+    'present': 0.9,
+    'equal': 0.1,
+    'ordering': 0.5,
+    'substring': 0.2,
+    'approx': 0.1,
+}
+
+
+class MatchStatistics:
+    """Observed evaluation and match counts for leaf filters.
+
+    Pass an instance to ``compile(stats=...)`` to collect counts while
+    matching, then to ``compile(reorder=...)`` or ``reorder()`` to order
+    groups by the selectivity that was actually observed.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def counter(self, key):
+        try:
+            return self.counts[key]
+        except KeyError:
+            return self.counts.setdefault(key, [0, 0])
+
+    def selectivity(self, key):
+        try:
+            evaluated, matched = self.counts[key]
+        except KeyError:
+            return None
+
+        # Laplace smoothing keeps a handful of samples from pinning the
+        # estimate to exactly 0 or 1.
+        return (matched + 1.0) / (evaluated + 2.0)
+
+    def clear(self):
+        self.counts.clear()
+
+
+def leaf_kind(comp, val):
+    if comp == '=':
+        if val == '*':
+            return 'present'
+        elif '*' in val:
+            return 'substring'
+        return 'equal'
+    elif comp in ('<=', '>='):
+        return 'ordering'
+    elif comp == '~=':
+        return 'approx'
+
+
+def estimate(filt, stats=None):
+    if filt.type == 'filter':
+        kind = leaf_kind(filt.comp, filt.val)
+        cost = LEAF_COST.get(kind, 1.0)
+        selectivity = stats.selectivity(filt.to_string()) if stats is not None else None
+
+        if selectivity is None:
+            selectivity = LEAF_SELECTIVITY.get(kind, 0.0)
+
+        return cost, selectivity
+
+    estimates = order(filt.comp, filt.filters, stats)
+    cost = 0.0
+
+    if filt.comp == '&':
+        reach = 1.0
+
+        for c, p in estimates:
+            cost += reach * c
+            reach *= p
+
+        return cost, reach
+    elif filt.comp == '|':
+        reach = 1.0
+
+        for c, p in estimates:
+            cost += reach * c
+            reach *= 1.0 - p
+
+        return cost, 1.0 - reach
+    elif filt.comp == '!':
+        miss = 1.0
+
+        for c, p in estimates:
+            cost += c
+            miss *= 1.0 - p
+
+        return cost, miss
+
+    return 1.0, 0.0
+
+
+def order(comp, filters, stats=None):
+    estimates = [estimate(f, stats) for f in filters]
+
+    if comp in ('&', '|'):
+        estimates.sort(key=lambda e: _rank(comp, e))
+
+    return estimates
+
+
+def reorder(comp, filters, stats=None):
+    if comp not in ('&', '|'):
+        return list(filters)
+
+    keyed = [(_rank(comp, estimate(f, stats)), i, f) for i, f in enumerate(filters)]
+    keyed.sort(key=lambda k: (k[0], k[1]))
+
+    return [f for _, _, f in keyed]
+
+
+def _rank(comp, estimate):
+    cost, selectivity = estimate
+    decisive = 1.0 - selectivity if comp == '&' else selectivity
+
+    if decisive <= 0.0:
+        return float('inf')
+
+    return cost / decisive
@@ -0,0 +1,212 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+
+import ldap_filter.codec as codec
+from ldap_filter.cache import CacheInfo
+
+MAGIC = b'LDFC'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHHI')
+# Payload length, CRC-32 of the payload and length of the key, which is the
+# start of the payload. The encoded tree follows it.
+_RECORD = struct.Struct('<III')
+
+
+class DiskCache:
+    """Parsed filters stored in a file, keyed on the filter string.
+
+    It has the interface of ``ParseCache`` and can stand in for it as
+    ``Filter.parse_cache``. The file is memory mapped when the cache is
+    opened and only the keys are read; a tree is decoded from its record
+    when it is asked for, which is much faster than parsing the string
+    again. Every hit returns a new tree.
+
+    Filters parsed on a miss are kept in memory until ``save()`` writes the
+    whole cache to a temporary file and renames it over the old one, so
+    readers never see a partly written file. Every record carries a CRC-32;
+    a damaged record is treated as a miss and a file with a different
+    format version is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._pending = {}
+        self._dirty = False
+        self._map = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def __len__(self):
+        return len(self._index) + len(self._pending)
+
+    def __contains__(self, key):
+        return key in self._pending or key in self._index
+
+    def get(self, key):
+        with self._lock:
+            body = self._body(key)
+
+            if body is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return codec.decode(body)[0]
+
+    def put(self, key, tree):
+        body = codec.encode(tree)
+
+        with self._lock:
+            self._pending[key] = body
+            self._dirty = True
+
+    def parse(self, key, parse):
+        tree = self.get(key)
+
+        if tree is None:
+            tree = parse(key)
+            self.put(key, tree)
+
+        return tree
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+
+            # Copied out of the map, which is closed before the rename.
+            records = {}
+
+            for key in list(self._index):
+                body = self._body(key)
+                if body is not None:
+                    records[key] = body
+
+            records.update(self._pending)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(prefix='.ldap-filter-', dir=directory)
+
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_HEADER.pack(MAGIC, VERSION, 0, len(records)))
+
+                    for key, body in records.items():
+                        key = key.encode('utf-8', 'surrogatepass')
+                        payload = key + body
+                        f.write(_RECORD.pack(len(payload), zlib.crc32(payload), len(key)))
+                        f.write(payload)
+
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self._close()
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+
+                if self._map is None:
+                    self._open()
+                raise
+
+            self._pending.clear()
+            self._dirty = False
+            self._open()
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+            self._pending.clear()
+            self._dirty = True
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._close()
+            self._index.clear()
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, 0, None, len(self._index) + len(self._pending))
+
+    def _open(self):
+        try:
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # A missing or empty file is an empty cache.
+            return
+
+        self._index = _read_index(self._map)
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _body(self, key):
+        try:
+            return self._pending[key]
+        except KeyError:
+            pass
+
+        try:
+            start, body, end, crc = self._index[key]
+        except KeyError:
+            return None
+
+        # A copy, a view into the map would stop save() from closing it
+        # while another thread decodes the body.
+        data = self._map[start:end]
+
+        if zlib.crc32(data) != crc:
+            del self._index[key]
+            return None
+
+        return data[body - start:]
+
+
+def _read_index(data):
+    index = {}
+
+    if len(data) < _HEADER.size:
+        return index
+
+    magic, version, _, count = _HEADER.unpack_from(data)
+
+    if magic != MAGIC or version != VERSION:
+        return index
+
+    offset = _HEADER.size
+    size = len(data)
+
+    for _ in range(count):
+        if offset + _RECORD.size > size:
+            break
+
+        length, crc, key_size = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        body = start + key_size
+        end = start + length
+
+        if end > size or body > end:
+            break
+
+        try:
+            key = data[start:body].decode('utf-8', 'surrogatepass')
+        except UnicodeDecodeError:
+            break
+
+        index[key] = (start, body, end, crc)
+        offset = end
+
+    return index
@@ -1,14 +1,27 @@
 import re
+import operator
 import platform
+import sys
+import threading
+import weakref
+import ldap_filter.approx as approx
+import ldap_filter.cost as cost
+import ldap_filter.optimizer as optimizer
 import ldap_filter.parser as parser
 
-from ldap_filter.soundex import soundex_compare
+from functools import lru_cache
+from ldap_filter.cache import ParseCache
+from ldap_filter.cost import MatchStatistics
 
 
 class LDAPBase:
+    __slots__ = ()
+
     indent = 4
     collapsed = False
     filters = None
+    parse_cache = None
+    approx_matcher = 'soundex'
 
     def simplify(self):
         if self.filters:
@@ -19,12 +32,68 @@ class LDAPBase:
 
         return self
 
+    def optimize(self):
+        return optimizer.optimize(self)
+
+    def freeze(self):
+        raise NotImplementedError
+
+    def reorder(self, stats=None):
+        if self.filters:
+            self.filters = cost.reorder(self.comp, [f.reorder(stats) for f in self.filters], stats)
+
+        return self
+
     def to_string(self, indent, indt_char, level):
         raise NotImplementedError
 
     def match(self, data):
         raise NotImplementedError
 
+    def compile(self, reorder=False, stats=None):
+        raise NotImplementedError
+
+    def filter_records(self, records, reorder=False):
+        predicate = self.compile(reorder)
+
+        return (r for r in records if predicate(r))
+
+    def match_many(self, records, reorder=False):
+        predicate = self.compile(reorder)
+
+        return (predicate(r) for r in records)
+
+    def match_parallel(self, records, workers=None, chunksize=1000, ordered=True, mp_context=None):
+        from ldap_filter.parallel import match_parallel
+
+        return match_parallel(self, records, workers, chunksize, ordered, mp_context)
+
+    def match_columns(self, table, length=None):
+        from ldap_filter.columnar import match_columns
+
+        return match_columns(self, table, length)
+
+    def to_program(self):
+        from ldap_filter.program import lower
+
+        return lower(self)
+
+    def to_ber(self):
+        from ldap_filter.ber import encode
+
+        return encode(self)
+
+    @staticmethod
+    def from_ber(data):
+        from ldap_filter.ber import BERError, decode
+
+        filt, end = decode(data)
+
+        if end != len(data):
+            raise BERError('Trailing data after the filter')
+
+        return filt
+
     @staticmethod
     def _indent(indent, indt_char=' ', level=0):
         if type(indent) == bool and indent:
@@ -44,28 +113,48 @@ class LDAPBase:
 
     @staticmethod
     def parse(filt):
+        if not isinstance(filt, str):
+            filt = parser.decode(filt)
+
+        cache = LDAPBase.parse_cache
+
+        if cache is not None:
+            return cache.parse(filt, LDAPBase._parse)
+
+        return LDAPBase._parse(filt)
+
+    @staticmethod
+    def _parse(filt):
         filt = _strip_whitespace(filt)
         return parser.parse(filt, actions=ParserActions())
 
+    @staticmethod
+    def enable_parse_cache(maxsize=1024):
+        LDAPBase.parse_cache = ParseCache(maxsize)
+        return LDAPBase.parse_cache
+
+    @staticmethod
+    def enable_disk_cache(path):
+        from ldap_filter.diskcache import DiskCache
+
+        LDAPBase.parse_cache = DiskCache(path)
+        return LDAPBase.parse_cache
+
+    @staticmethod
+    def disable_parse_cache():
+        LDAPBase.parse_cache = None
+
     @staticmethod
     def escape(data):
-        escaped = data.replace('\\', '\\5c')
-        escaped = escaped.replace('*', '\\2a')
-        escaped = escaped.replace('(', '\\28')
-        escaped = escaped.replace(')', '\\29')
-        escaped = escaped.replace('\x00', '\\00')
+        return _escape(data)
 
-        return escaped
+    @staticmethod
+    def escape_many(data):
+        return _escape_many(data)
 
     @staticmethod
     def unescape(data):
-        unescaped = data.replace('\\5c', '\\')
-        unescaped = unescaped.replace('\\2a', '*')
-        unescaped = unescaped.replace('\\28', '(')
-        unescaped = unescaped.replace('\\29', ')')
-        unescaped = unescaped.replace('\\00', '\x00')
-
-        return unescaped
+        return parser.unescape(data)
 
     @staticmethod
     def match_string(data, filt):
@@ -82,10 +171,11 @@ class LDAPBase:
         return any(_ss_helper(m, filt) for m in match)
 
     @staticmethod
-    def match_approx(data, filt):
+    def match_approx(data, filt, matcher=None):
         match = _as_list(data)
+        compare = approx.get(matcher or Filter.approx_matcher).match
 
-        return any(_approx_helper(m, filt) for m in match)
+        return any(compare(m, filt) for m in match if m.__class__ is not bytes)
 
     @staticmethod
     def match_lte(data, filt):
@@ -117,11 +207,15 @@ class LDAPBase:
 
 
 class Filter(LDAPBase):
-    def __init__(self, attr, comp, val):
-        self.type = 'filter'
+    __slots__ = ('attr', 'comp', 'val', 'matcher', '_substring')
+
+    type = 'filter'
+
+    def __init__(self, attr, comp, val, matcher=None):
         self.attr = attr
         self.comp = comp
         self.val = val
+        self.matcher = matcher
 
     def __repr__(self):
         return self.to_string()
@@ -146,6 +240,9 @@ class Filter(LDAPBase):
         if self.comp == '=':
             if value == '*' and attrval:
                 return True
+            elif '*' in value:
+                test = self._substring_test()
+                return any(test(m) for m in _as_list(attrval))
             else:
                 return Filter.match_string(attrval, value)
         elif self.comp == '<=':
@@ -153,10 +250,47 @@ class Filter(LDAPBase):
         elif self.comp == '>=':
             return Filter.match_gte(attrval, value)
         elif self.comp == '~=':
-            return Filter.match_approx(attrval, value)
+            return Filter.match_approx(attrval, value, self.matcher)
         else:
             pass
 
+    def _substring_test(self):
+        # Cached on the node, keyed on the value in case it is reassigned.
+        try:
+            val, test = self._substring
+            if val is self.val:
+                return test
+        except AttributeError:
+            pass
+
+        test = _substring_test(self.val)
+        object.__setattr__(self, '_substring', (self.val, test))
+        return test
+
+    def __getstate__(self):
+        # The cached substring test is a closure, rebuilt when needed.
+        return None, {'attr': self.attr, 'comp': self.comp, 'val': self.val, 'matcher': self.matcher}
+
+    def compile(self, reorder=False, stats=None):
+        attr = self.attr
+        test = _compile_test(self.comp, self.val, self.matcher)
+
+        def predicate(data):
+            try:
+                attrval = data[attr]
+            except KeyError:
+                return False
+
+            return test(attrval)
+
+        if stats is not None:
+            return _compile_counter(predicate, stats.counter(self.to_string()))
+
+        return predicate
+
+    def freeze(self):
+        return FrozenFilter(self.attr, self.comp, self.val, self.matcher)
+
     def to_string(self, indent=False, indt_char=' ', level=0):
         return ''.join([
             self._indent(indent, indt_char, level),
@@ -173,11 +307,17 @@ class Filter(LDAPBase):
 
 
 class Group(LDAPBase):
+    __slots__ = ('comp', 'filters')
+
+    type = 'group'
+
     def __init__(self, comp, filters):
-        self.type = 'group'
         self.comp = comp
         self.filters = filters
 
+    def __getstate__(self):
+        return None, {'comp': self.comp, 'filters': self.filters}
+
     def __repr__(self):
         return self.to_string()
 
@@ -193,6 +333,25 @@ class Group(LDAPBase):
     def match(self, data):
         raise NotImplementedError
 
+    def compile(self, reorder=False, stats=None):
+        raise NotImplementedError
+
+    def freeze(self):
+        return FrozenGroup(self.comp, self.filters)
+
+    def _compile_children(self, reorder, stats):
+        filters = self.filters
+
+        if reorder:
+            filters = cost.reorder(self.comp, filters, reorder if isinstance(reorder, MatchStatistics) else None)
+
+        # Statistics are collected per leaf, so only merge equality tests
+        # when nobody is counting them.
+        if stats is None:
+            filters = _dispatch_equal(self.comp, filters)
+
+        return tuple(f.compile(reorder, stats) for f in filters)
+
     def to_string(self, indent=False, indt_char=' ', level=0):
         id_str = self._indent(indent, indt_char, level)
         id_str2 = id_str
@@ -223,35 +382,275 @@ class Group(LDAPBase):
 
 
 class GroupOr(Group):
+    __slots__ = ()
+
     def __init__(self, filters):
         super().__init__(comp='|', filters=filters)
 
+    def freeze(self):
+        return FrozenGroupOr(self.filters)
+
     def match(self, data):
         return any(f.match(data) for f in self.filters)
 
+    def compile(self, reorder=False, stats=None):
+        predicates = self._compile_children(reorder, stats)
+
+        def predicate(data):
+            for p in predicates:
+                if p(data):
+                    return True
+            return False
+
+        return predicate
+
 
 class GroupAnd(Group):
+    __slots__ = ()
+
     def __init__(self, filters):
         super().__init__(comp='&', filters=filters)
 
+    def freeze(self):
+        return FrozenGroupAnd(self.filters)
+
     def match(self, data):
         return all(f.match(data) for f in self.filters)
 
+    def compile(self, reorder=False, stats=None):
+        predicates = self._compile_children(reorder, stats)
+
+        def predicate(data):
+            for p in predicates:
+                if not p(data):
+                    return False
+            return True
+
+        return predicate
+
 
 class GroupNot(Group):
+    __slots__ = ()
+
     def __init__(self, filters):
         super().__init__(comp='!', filters=filters)
 
+    def freeze(self):
+        return FrozenGroupNot(self.filters)
+
     def match(self, data):
         return not any(_not_helper(f, data) for f in self.filters)
 
+    def compile(self, reorder=False, stats=None):
+        predicates = self._compile_children(reorder, stats)
+
+        def predicate(data):
+            for p in predicates:
+                try:
+                    if p(data):
+                        return False
+                except AttributeError:
+                    pass
+            return True
+
+        return predicate
+
+    def simplify(self):
+        return self
+
+
+class Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} objects are immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} objects are immutable'.format(type(self).__name__))
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Frozen):
+            return NotImplemented
+
+        return self._hash == other._hash and self._key == other._key
+
+    def __hash__(self):
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def freeze(self):
+        return self
+
+    def match(self, data):
+        # Compiled tests resolve Filter.approx_matcher once, so the cached
+        # predicate is only used while the global matcher is unchanged.
+        try:
+            matcher, predicate = self._predicate
+        except AttributeError:
+            matcher = predicate = None
+
+        if predicate is None or matcher is not Filter.approx_matcher:
+            matcher = Filter.approx_matcher
+            predicate = self.compile()
+            object.__setattr__(self, '_predicate', (matcher, predicate))
+
+        return predicate(data)
+
     def simplify(self):
+        if self.filters:
+            if len(self.filters) == 1:
+                return self.filters[0].simplify()
+            else:
+                return self._replace([f.simplify() for f in self.filters])
+
         return self
 
+    def optimize(self):
+        return optimizer.optimize(self).freeze()
+
+    def reorder(self, stats=None):
+        if self.filters:
+            return self._replace(cost.reorder(self.comp, [f.reorder(stats) for f in self.filters], stats))
+
+        return self
+
+
+class FrozenFilter(Frozen, Filter):
+    __slots__ = ('_key', '_hash', '_predicate', '__weakref__')
+
+    def __new__(cls, attr, comp, val, matcher=None):
+        return _intern(cls, (cls, attr, comp, val, matcher), attr=attr, comp=comp, val=val, matcher=matcher)
+
+    def __init__(self, attr, comp, val, matcher=None):
+        pass
+
+    def __reduce__(self):
+        return type(self), (self.attr, self.comp, self.val, self.matcher)
+
+
+class FrozenGroup(Frozen, Group):
+    __slots__ = ('_key', '_hash', '_predicate', '__weakref__')
+
+    def __new__(cls, comp, filters):
+        filters = tuple(f.freeze() for f in filters)
+        return _intern(cls, (cls, comp, filters), comp=comp, filters=filters)
+
+    def __init__(self, comp, filters):
+        pass
+
+    def __reduce__(self):
+        return type(self), (self.comp, self.filters)
+
+    def _replace(self, filters):
+        return type(self)(self.comp, filters)
+
+
+class FrozenGroupOr(Frozen, GroupOr):
+    __slots__ = ('_key', '_hash', '_predicate', '__weakref__')
+
+    def __new__(cls, filters):
+        filters = tuple(f.freeze() for f in filters)
+        return _intern(cls, (cls, filters), comp='|', filters=filters)
+
+    def __init__(self, filters):
+        pass
+
+    def __reduce__(self):
+        return type(self), (self.filters,)
+
+    def _replace(self, filters):
+        return type(self)(filters)
+
+
+class FrozenGroupAnd(Frozen, GroupAnd):
+    __slots__ = ('_key', '_hash', '_predicate', '__weakref__')
+
+    def __new__(cls, filters):
+        filters = tuple(f.freeze() for f in filters)
+        return _intern(cls, (cls, filters), comp='&', filters=filters)
+
+    def __init__(self, filters):
+        pass
+
+    def __reduce__(self):
+        return type(self), (self.filters,)
+
+    def _replace(self, filters):
+        return type(self)(filters)
+
+
+class FrozenGroupNot(Frozen, GroupNot):
+    __slots__ = ('_key', '_hash', '_predicate', '__weakref__')
+
+    def __new__(cls, filters):
+        filters = tuple(f.freeze() for f in _as_list(filters))
+        return _intern(cls, (cls, filters), comp='!', filters=filters)
+
+    def __init__(self, filters):
+        pass
+
+    def __reduce__(self):
+        return type(self), (self.filters,)
+
+    def simplify(self):
+        return self
+
+    def _replace(self, filters):
+        return type(self)(filters)
+
+
+class EqualitySet:
+    """Equality tests on one attribute merged into a single set lookup."""
+
+    def __init__(self, comp, attr, filters):
+        self.comp = comp
+        self.attr = attr
+        self.filters = filters
+
+    def compile(self, reorder=False, stats=None):
+        attr = self.attr
+        values = frozenset(Filter.unescape(f.val).lower() for f in self.filters)
+        tests = tuple(_compile_equal(f.val) for f in self.filters)
+
+        if self.comp == '&':
+            found = values.issubset
+            fallback = lambda attrval: all(t(attrval) for t in tests)
+        elif self.comp == '|':
+            found = lambda lowered: not values.isdisjoint(lowered)
+            fallback = lambda attrval: any(t(attrval) for t in tests)
+        else:
+            found = lambda lowered: not values.isdisjoint(lowered)
+            fallback = lambda attrval: any(_swallow(t, attrval) for t in tests)
+
+        def predicate(data):
+            try:
+                attrval = data[attr]
+            except KeyError:
+                return False
+
+            try:
+                lowered = set(m.lower() for m in _as_list(attrval) if m)
+            except AttributeError:
+                # Run the original tests in order so errors surface the same way.
+                return fallback(attrval)
+
+            return found(lowered)
+
+        return predicate
+
 
 class Attribute:
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        self.name = name
+        self.name = sys.intern(name) if type(name) is str else name
 
     def present(self):
         return Filter(self.name, '=', '*')
@@ -271,8 +670,8 @@ class Attribute:
     def contains(self, value):
         return Filter(self.name, '=', '*' + self.escape(_to_string(value)) + '*')
 
-    def approx(self, value):
-        return Filter(self.name, '~=', self.escape(_to_string(value)))
+    def approx(self, value, matcher=None):
+        return Filter(self.name, '~=', self.escape(_to_string(value)), matcher)
 
     def lte(self, value):
         return Filter(self.name, '<=', self.escape(_to_string(value)))
@@ -280,15 +679,58 @@ class Attribute:
     def gte(self, value):
         return Filter(self.name, '>=', self.escape(_to_string(value)))
 
+    def equal_to_any(self, values):
+        name = self.name
+        values = _escape_many([v if type(v) is str else _to_string(v) for v in values])
+
+        return GroupOr([Filter(name, '=', v) for v in values])
+
     @staticmethod
     def escape(data):
-        escaped = data.replace('\\', '\\5c')
-        escaped = escaped.replace('*', '\\2a')
-        escaped = escaped.replace('(', '\\28')
-        escaped = escaped.replace(')', '\\29')
-        escaped = escaped.replace('\x00', '\\00')
+        return _escape(data)
+
+
+def _escape(data):
+    escaped = data.replace('\\', '\\5c')
+    escaped = escaped.replace('*', '\\2a')
+    escaped = escaped.replace('(', '\\28')
+    escaped = escaped.replace(')', '\\29')
+    escaped = escaped.replace('\x00', '\\00')
+
+    return escaped
+
+
+def _escape_many(data):
+    data = list(data)
+
+    if not data:
+        return []
+
+    # The values are escaped joined together, five passes over one string
+    # instead of five per value, unless a value contains the separator.
+    joined = '\n'.join(data)
+
+    if joined.count('\n') == len(data) - 1:
+        return _escape(joined).split('\n')
+
+    return [_escape(value) for value in data]
+
+
+def _intern(cls, key, **fields):
+    with _interned_lock:
+        node = _interned.get(key)
 
-        return escaped
+        if node is None:
+            node = object.__new__(cls)
+
+            for name, value in fields.items():
+                object.__setattr__(node, name, value)
+
+            object.__setattr__(node, '_key', key)
+            object.__setattr__(node, '_hash', hash(key))
+            _interned[key] = node
+
+    return node
 
 
 def _as_list(val):
@@ -298,60 +740,77 @@ def _as_list(val):
     return val
 
 
-def _ss_regex(filt):
-    pattern = re.sub(r'\*', '.*', filt)
-    pattern = re.sub(r'(?<=\\)([0-9a-fA-F]{,2})', _ss_regex_escaped, pattern)
-    return re.compile('^' + pattern + '$', re.I)
+@lru_cache(maxsize=1024)
+def _substring_test(filt):
+    """Literal, case-insensitive matcher for a value containing wildcards.
 
+    Binary values, such as base64 values of LDIF files that are not UTF-8,
+    never match. ``str.lower`` is called unbound so other values that are not
+    strings raise a TypeError, like the regular expressions this replaces.
+    """
+    pieces = [Filter.unescape(p).lower() for p in filt.split('*')]
+    first, middle, last = pieces[0], pieces[1:-1], pieces[-1]
 
-def _ss_regex_escaped(match):
-    s = match.group(0) if match else None
+    if not middle:
+        if not last:
+            return lambda cv: cv.__class__ is not bytes and str.lower(cv).startswith(first)
+        elif not first:
+            return lambda cv: cv.__class__ is not bytes and str.lower(cv).endswith(last)
+    elif len(middle) == 1 and not first and not last:
+        infix = middle[0]
+        return lambda cv: cv.__class__ is not bytes and infix in str.lower(cv)
 
-    if s in ['28', '29', '5c', '2a']:
-        s = 'x{}'.format(match.group(0).upper())
+    minimum = sum(len(p) for p in pieces)
 
-    return s
+    def test(cv):
+        if cv.__class__ is bytes:
+            return False
 
+        cv = str.lower(cv)
 
-def _strip_whitespace(filt):
-    if ' ' or '\n' or '\r\n' in filt:
-        att_val = re.findall(r'(?<=[=])(?<=[~=]|[>=]|[<=])(.*?)(?=\))', filt)
-        filt = filt.replace('\r\n', '')
-        filt = filt.replace('\n', '')
-        filt = filt.replace(' ', '')
+        if len(cv) < minimum or not cv.startswith(first) or not cv.endswith(last):
+            return False
 
-        for s in att_val:
-            key = s.replace('\r\n', '')
-            key = key.replace('\n', '')
-            key = key.replace(' ', '')
-            filt = filt.replace(key, s)
+        pos = len(first)
+        end = len(cv) - len(last)
 
-        att = re.findall(r'(?<=[(])[a-zA-Z0-9 -.]*?(?=[~=]|[>=]|[<=]|[=])', filt)
+        for piece in middle:
+            pos = cv.find(piece, pos, end)
+            if pos < 0:
+                return False
+            pos += len(piece)
 
-        for s in att:
-            if ' ' in s:
-                regex = re.compile('(?<=[(])' + s + '?(?=[~=]|[>=]|[<=]|[=])', re.I)
-                filt = re.sub(regex, s.replace(' ', ''), filt)
+        return True
 
-    return filt
+    return test
 
 
-def _ss_helper(cv, filt):
-    regex = _ss_regex(filt)
+def _strip_whitespace(filt):
+    if ' ' not in filt and '\n' not in filt:
+        return filt
 
-    return regex.match(cv)
+    # Values run from the '=' of the operator to the closing parenthesis and
+    # are kept as they are; spaces and newlines anywhere else are dropped.
+    return ''.join(_TOKENS.findall(filt))
+
+
+def _ss_helper(cv, filt):
+    return _substring_test(filt)(cv)
 
 
 def _ms_helper(cv, filt):
     if cv:
-        return cv.lower() == Filter.unescape(filt).lower()
+        return cv.lower() == _equal_operand(filt)
 
 
-def _approx_helper(cv, filt):
-    return soundex_compare(cv, filt)
+def _equal_operand(filt):
+    return Filter.unescape(filt).lower()
 
 
 def _lte_helper(cv, filt):
+    if cv.__class__ is bytes:
+        return False
+
     try:
         val = int(cv) <= int(filt)
     except ValueError:
@@ -360,6 +819,9 @@ def _lte_helper(cv, filt):
 
 
 def _gte_helper(cv, filt):
+    if cv.__class__ is bytes:
+        return False
+
     try:
         val = int(cv) >= int(filt)
     except ValueError:
@@ -374,119 +836,200 @@ def _not_helper(filt, data):
         pass
 
 
-def _to_string(val):
-    try:
-        val = str(val)
-    except ValueError:
-        print('Could not convert data to a string.')
-        raise
-    return val
+def _compile_test(comp, filt, matcher=None):
+    if comp == '=':
+        if filt == '*':
+            return _compile_present()
+        elif '*' in filt:
+            return _compile_substring(filt)
+        else:
+            return _compile_equal(filt)
+    elif comp == '<=':
+        return _compile_ordering(filt, operator.le)
+    elif comp == '>=':
+        return _compile_ordering(filt, operator.ge)
+    elif comp == '~=':
+        return _compile_approx(filt, matcher)
+    else:
+        return _compile_none()
 
 
-class ParserActions:
+def _compile_present():
+    match = _substring_test('*')
 
-    @staticmethod
-    def elements_to_string(elements=None):
-        if elements:
-            string = ''
+    def test(attrval):
+        if attrval:
+            return True
 
-            for e in elements:
-                try:
-                    string += e.text if e else ''
-                except AttributeError:
-                    string += str(e) if e else ''
-            return string
+        return any(match(m) for m in _as_list(attrval))
 
-    def return_string(self, input, start, end, elements=None):
-        return self.elements_to_string(elements)
+    return test
 
-    def return_hex(self, input, start, end, elements=None):
-        string = self.elements_to_string(elements)
 
-        if string:
-            return int(string, 16)
+def _compile_substring(filt):
+    match = _substring_test(filt)
 
-    def return_escaped_char(self, input, start, end, elements=None):
-        string = self.elements_to_string(elements)
+    def test(attrval):
+        if isinstance(attrval, (list, tuple)):
+            return any(match(m) for m in attrval)
 
-        if string:
-            chr_code = int(string.replace('\\', ''))
+        return match(attrval)
 
-            return chr(chr_code)
+    return test
 
-    @staticmethod
-    def return_options(input, start, end, attr, opts=None, elements=None):
-        if opts:
-            opts.pop(0)
-            opts = opts.pop(0)
-            opts = opts.split(';')
 
-        attr[0]['options'] = opts if opts else []
-        return attr[0]
+def _compile_equal(filt):
+    value = _equal_operand(filt)
 
-    def return_oid_type(self, input, start, end, elements=None):
-        oid = self.elements_to_string(elements)
+    def test(attrval):
+        if isinstance(attrval, (list, tuple)):
+            return any(m and m.lower() == value for m in attrval)
 
-        if oid:
-            return {
-                'type': 'oid',
-                'attribute': oid
-            }
+        return bool(attrval) and attrval.lower() == value
 
-    def return_attr_type(self, input, start, end, elements=None):
-        name = self.elements_to_string(elements)
+    return test
 
-        if name:
-            return {
-                'type': 'attribute',
-                'attribute': name
-            }
 
-    @staticmethod
-    def return_simple_filter(input, start, end, elements=None):
-        attr = elements[0]['attribute']
-        comp = getattr(elements[1], 'text')
-        value = elements[2]
+def _compile_ordering(filt, op):
+    number = _to_int(filt)
 
-        return Filter(attr, comp, value)
+    # Conversions are tried in the order of _lte_helper and _gte_helper, so
+    # a value int() rejects with a TypeError raises here too. Binary values
+    # are never in order with text.
+    def compare(cv):
+        if cv.__class__ is bytes:
+            return False
 
-    @staticmethod
-    def return_present_filter(input, start, end, elements=None):
-        attr = elements[0]['attribute']
+        try:
+            value = int(cv)
+        except ValueError:
+            return op(str(cv), filt)
 
-        return Filter.attribute(attr).present()
+        if number is None:
+            return op(str(cv), filt)
 
-    @staticmethod
-    def return_wildcard(input, start, end, elements=None):
-        attr = elements[0]['attribute']
-        value = getattr(elements[2], 'text')
+        return op(value, number)
+
+    def test(attrval):
+        if isinstance(attrval, (list, tuple)):
+            return any(compare(m) for m in attrval)
+
+        return compare(attrval)
+
+    return test
+
+
+def _compile_approx(filt, matcher=None):
+    matcher = approx.get(matcher or Filter.approx_matcher)
+    compare = matcher.match
+
+    if matcher.keyed:
+        key = matcher.key
+
+        try:
+            code = key(filt)
+        except (AttributeError, TypeError, ValueError, IndexError):
+            pass
+        else:
+            if not code:
+                return _compile_none()
+
+            return lambda attrval: any(key(m) == code for m in _as_list(attrval) if m.__class__ is not bytes)
+
+    return lambda attrval: any(compare(m, filt) for m in _as_list(attrval) if m.__class__ is not bytes)
+
+
+def _compile_none():
+    return lambda attrval: False
+
+
+def _dispatch_equal(comp, filters):
+    result = []
+
+    # Only neighbouring tests are merged, so the remaining children are still
+    # evaluated in their original order.
+    for f in filters:
+        if result and _is_equal(f):
+            last = result[-1]
 
-        return Filter(attr, '=', value)
+            if isinstance(last, EqualitySet):
+                if last.attr == f.attr:
+                    last.filters.append(f)
+                    continue
+            elif _is_equal(last) and last.attr == f.attr:
+                result[-1] = EqualitySet(comp, f.attr, [last, f])
+                continue
+
+        result.append(f)
+
+    return result
+
+
+def _is_equal(filt):
+    return filt.type == 'filter' and filt.comp == '=' and '*' not in filt.val
+
+
+def _swallow(test, attrval):
+    try:
+        return test(attrval)
+    except AttributeError:
+        pass
+
+
+def _compile_counter(predicate, counter):
+    def counted(data):
+        result = predicate(data)
+        counter[0] += 1
+
+        if result:
+            counter[1] += 1
+
+        return result
+
+    return counted
+
+
+def _to_int(val):
+    try:
+        return int(val)
+    except ValueError:
+        return None
+
+
+def _to_string(val):
+    try:
+        val = str(val)
+    except ValueError:
+        print('Could not convert data to a string.')
+        raise
+    return val
+
+
+class ParserActions:
 
     @staticmethod
-    def return_filter(input, start, end, filt=None, elements=None):
-        for f in filt:
-            if isinstance(f, (Filter, GroupAnd, GroupOr, GroupNot)):
-                return f
+    def return_simple_filter(input, start, end, attr, comp, value):
+        # Attribute names repeat across filters, share one string for each.
+        return Filter(sys.intern(attr), sys.intern(comp), value)
 
     @staticmethod
-    def return_and_filter(input, start, end, filters=None, elements=None):
-        for f in filters:
-            if f.elements:
-                return Filter.AND(f.elements)
+    def return_and_filter(input, start, end, filters):
+        return Filter.AND(filters)
 
     @staticmethod
-    def return_or_filter(input, start, end, filters=None, elements=None):
-        for f in filters:
-            if f.elements:
-                return Filter.OR(f.elements)
+    def return_or_filter(input, start, end, filters):
+        return Filter.OR(filters)
 
     @staticmethod
-    def return_not_filter(input, start, end, filt=None, elements=None):
-        for f in filt:
-            if isinstance(f, (Filter, GroupAnd, GroupOr, GroupNot)):
-                return Filter.NOT(f)
+    def return_not_filter(input, start, end, filt):
+        return Filter.NOT(filt)
 
 
 class InvalidIndentChar(Exception):
     pass
+
+
+_TOKENS = re.compile(r'=[^)]*(?=\))|[^=\r\n ]+|=|\r(?!\n)')
+
+_interned = weakref.WeakValueDictionary()
+_interned_lock = threading.Lock()
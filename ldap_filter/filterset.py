@@ -0,0 +1,235 @@
+from collections import defaultdict
+
+from ldap_filter.filter import Filter, _compile_test
+
+
+class FilterSet:
+    """A collection of filters matched against an entry in a single pass.
+
+    Filters are frozen on the way in, so identical subtrees, down to single
+    ``(attr=value)`` tests, are stored once however many filters share them.
+    ``match`` evaluates every distinct node at most once per entry, skips
+    tests on attributes the entry does not have and answers all equality
+    tests on an attribute with one set lookup per value.
+
+    A filter that raises on an entry, such as an equality test on an
+    integer value, does not match it and does not affect the others.
+
+    Nodes are reference counted, so removing a filter releases the nodes no
+    other filter uses and their slots are reused.
+    """
+
+    def __init__(self, filters=None):
+        self.filters = {}
+        self._roots = {}
+        self._slots = {}
+        self._nodes = []
+        self._keys = []
+        self._refs = []
+        self._free = []
+        self._equal = defaultdict(dict)
+        self._approx = Filter.approx_matcher
+        self._approx_slots = set()
+        self._next_id = 0
+
+        if isinstance(filters, dict):
+            for fid, filt in filters.items():
+                self.add(filt, fid)
+        elif filters is not None:
+            for filt in filters:
+                self.add(filt)
+
+    def __len__(self):
+        return len(self.filters)
+
+    def __contains__(self, fid):
+        return fid in self.filters
+
+    def add(self, filt, fid=None):
+        if fid is None:
+            while self._next_id in self.filters:
+                self._next_id += 1
+            fid = self._next_id
+
+        if isinstance(filt, str):
+            filt = Filter.parse(filt)
+
+        filt = filt.freeze()
+
+        if fid in self.filters:
+            self.remove(fid)
+
+        self.filters[fid] = filt
+        self._roots[fid] = self._slot(filt)
+
+        return fid
+
+    def remove(self, fid):
+        del self.filters[fid]
+        self._release(self._roots.pop(fid))
+
+    def match(self, entry):
+        if self._approx is not Filter.approx_matcher:
+            self._recompile_approx()
+
+        nodes = self._nodes
+        memo = {}
+
+        # Equality tests are answered up front: every value of an attribute
+        # is looked up once in the map of tests on that attribute.
+        for attr, tests in self._equal.items():
+            try:
+                attrval = entry[attr]
+            except KeyError:
+                continue
+
+            values = attrval if isinstance(attrval, (list, tuple)) else [attrval]
+
+            if all(isinstance(v, str) for v in values):
+                for slots in tests.values():
+                    for slot in slots:
+                        memo[slot] = False
+
+                for value in values:
+                    if value:
+                        for slot in tests.get(value.lower(), ()):
+                            memo[slot] = True
+
+        def evaluate(slot):
+            try:
+                return memo[slot]
+            except KeyError:
+                pass
+
+            leaf, comp, args = nodes[slot]
+
+            if leaf:
+                try:
+                    attrval = entry[comp]
+                except KeyError:
+                    result = False
+                else:
+                    result = bool(args(attrval))
+            elif comp == '&':
+                result = True
+                for child in args:
+                    if not evaluate(child):
+                        result = False
+                        break
+            elif comp == '|':
+                result = False
+                for child in args:
+                    if evaluate(child):
+                        result = True
+                        break
+            else:
+                result = True
+                for child in args:
+                    try:
+                        if evaluate(child):
+                            result = False
+                            break
+                    except AttributeError:
+                        pass
+
+            memo[slot] = result
+            return result
+
+        matched = []
+
+        # A filter whose tests fail on the entry's values does not match;
+        # the others still share everything already in the memo.
+        for fid, slot in self._roots.items():
+            try:
+                if evaluate(slot):
+                    matched.append(fid)
+            except _ERRORS:
+                pass
+
+        return matched
+
+    def _slot(self, filt):
+        slot = self._slots.get(filt)
+
+        if slot is None:
+            if filt.type == 'filter':
+                node = (True, filt.attr, _compile_test(filt.comp, filt.val, filt.matcher))
+            else:
+                node = (False, filt.comp, tuple(self._slot(f) for f in filt.filters))
+
+            if self._free:
+                slot = self._free.pop()
+                self._nodes[slot] = node
+                self._keys[slot] = filt
+            else:
+                slot = len(self._nodes)
+                self._nodes.append(node)
+                self._keys.append(filt)
+                self._refs.append(0)
+
+            key = _equal_key(filt)
+            if key is not None:
+                self._equal[filt.attr].setdefault(key, []).append(slot)
+
+            if _uses_global_matcher(filt):
+                self._approx_slots.add(slot)
+
+            self._slots[filt] = slot
+
+        self._refs[slot] += 1
+
+        return slot
+
+    def _release(self, slot):
+        stack = [slot]
+
+        while stack:
+            slot = stack.pop()
+            self._refs[slot] -= 1
+
+            if self._refs[slot]:
+                continue
+
+            leaf, comp, args = self._nodes[slot]
+            filt = self._keys[slot]
+            del self._slots[filt]
+
+            if leaf:
+                self._approx_slots.discard(slot)
+                key = _equal_key(filt)
+
+                if key is not None:
+                    tests = self._equal[filt.attr]
+                    tests[key].remove(slot)
+
+                    if not tests[key]:
+                        del tests[key]
+                    if not tests:
+                        del self._equal[filt.attr]
+            else:
+                stack.extend(args)
+
+            self._nodes[slot] = self._keys[slot] = None
+            self._free.append(slot)
+
+
+    def _recompile_approx(self):
+        # Approximate tests without a matcher of their own were compiled
+        # with the global matcher of the time and follow it when it changes.
+        self._approx = Filter.approx_matcher
+
+        for slot in self._approx_slots:
+            filt = self._keys[slot]
+            self._nodes[slot] = (True, filt.attr, _compile_test(filt.comp, filt.val))
+
+
+_ERRORS = (AttributeError, TypeError, ValueError, IndexError)
+
+
+def _uses_global_matcher(filt):
+    return filt.type == 'filter' and filt.comp == '~=' and not filt.matcher
+
+
+def _equal_key(filt):
+    if filt.type == 'filter' and filt.comp == '=' and '*' not in filt.val:
+        return Filter.unescape(filt.val).lower()
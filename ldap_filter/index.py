@@ -0,0 +1,265 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+import ldap_filter.approx as approx
+from ldap_filter.filter import Filter, _compile_test
+
+
+class EntryIndex:
+    """In-memory index of entry dictionaries for evaluating filters as set
+    operations instead of scanning every entry.
+
+    Each attribute gets a case-folded equality index, a presence set and
+    lazily built sorted indexes for ``<=``/``>=`` and approximate matcher
+    keys for ``~=``. With ``ngram`` set, an n-gram index narrows substring
+    candidates as well. Tests that cannot be
+    answered from an index are verified against the candidate entries that
+    have the attribute, so results always agree with ``Filter.match``.
+    """
+
+    def __init__(self, entries=(), ngram=None):
+        self.entries = []
+        self.ngram = ngram
+        self._attrs = defaultdict(set)
+        self._present = defaultdict(set)
+        self._equal = defaultdict(lambda: defaultdict(set))
+        self._grams = defaultdict(lambda: defaultdict(set))
+        self._sorted = {}
+        self._approx = defaultdict(dict)
+        self._universe = None
+
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry):
+        eid = len(self.entries)
+        self.entries.append(entry)
+        self._universe = None
+
+        for attr, attrval in entry.items():
+            values = attrval if isinstance(attrval, (list, tuple)) else [attrval]
+
+            self._attrs[attr].add(eid)
+            self._sorted.pop(attr, None)
+            self._approx.pop(attr, None)
+
+            if _safe(_PRESENT, attrval):
+                self._present[attr].add(eid)
+
+            for value in values:
+                if isinstance(value, str) and value:
+                    lowered = value.lower()
+                    self._equal[attr][lowered].add(eid)
+
+                    if self.ngram:
+                        for gram in _grams(lowered, self.ngram):
+                            self._grams[attr][gram].add(eid)
+
+        return eid
+
+    def search(self, filt):
+        return [self.entries[i] for i in sorted(self.search_ids(filt))]
+
+    def search_ids(self, filt):
+        return self._evaluate(filt)
+
+    def _evaluate(self, filt):
+        if filt.type == 'filter':
+            return self._evaluate_filter(filt.attr, filt.comp, filt.val, filt.matcher)
+
+        if filt.comp == '&':
+            return self._evaluate_and(filt.filters)
+        elif filt.comp == '|':
+            return set().union(*[self._evaluate(f) for f in filt.filters])
+        elif filt.comp == '!':
+            return self._all() - set().union(*[self._evaluate(f) for f in filt.filters])
+
+        return set()
+
+    def _evaluate_and(self, filters):
+        include = []
+        exclude = []
+
+        # Negated children are subtracted from the intersection of the others
+        # rather than being evaluated against the whole entry set.
+        for f in filters:
+            if f.type == 'group' and f.comp == '!':
+                exclude.extend(self._evaluate(c) for c in f.filters)
+            else:
+                include.append(self._evaluate(f))
+
+        if include:
+            include.sort(key=len)
+            result = set(include[0])
+
+            for ids in include[1:]:
+                if not result:
+                    break
+                result &= ids
+        else:
+            result = set(self._all())
+
+        for ids in exclude:
+            if not result:
+                break
+            result -= ids
+
+        return result
+
+    def _evaluate_filter(self, attr, comp, val, matcher=None):
+        if attr not in self._attrs:
+            return set()
+
+        if comp == '=':
+            if val == '*':
+                return set(self._present[attr])
+            elif '*' in val:
+                return self._verify(attr, comp, val, self._substring_candidates(attr, val))
+            else:
+                return set(self._equal[attr].get(Filter.unescape(val).lower(), ()))
+        elif comp in ('<=', '>='):
+            return self._evaluate_range(attr, comp, val)
+        elif comp == '~=':
+            matcher = approx.get(matcher or Filter.approx_matcher)
+
+            if matcher.keyed:
+                return self._evaluate_approx(attr, val, matcher)
+
+        return self._verify(attr, comp, val, self._attrs[attr], matcher)
+
+    def _evaluate_approx(self, attr, val, matcher):
+        try:
+            key = matcher.key(val)
+        except _ERRORS:
+            return set()
+
+        if not key:
+            return set()
+
+        return set(self._approx_index(attr, matcher).get(key, ()))
+
+    def _evaluate_range(self, attr, comp, val):
+        numbers, others, strings = self._sorted_index(attr)
+
+        try:
+            number = int(val)
+        except ValueError:
+            return _range(strings, comp, val)
+
+        return _range(numbers, comp, number) | _range(others, comp, val)
+
+    def _substring_candidates(self, attr, val):
+        if not self.ngram:
+            return self._attrs[attr]
+
+        candidates = None
+        postings = self._grams[attr]
+
+        for piece in val.split('*'):
+            for gram in _grams(Filter.unescape(piece).lower(), self.ngram):
+                ids = postings.get(gram, set())
+                candidates = set(ids) if candidates is None else candidates & ids
+
+                if not candidates:
+                    return set()
+
+        return self._attrs[attr] if candidates is None else candidates
+
+    def _verify(self, attr, comp, val, candidates, matcher=None):
+        test = _compile_test(comp, val, matcher)
+        entries = self.entries
+
+        return set(i for i in candidates if _safe(test, entries[i][attr]))
+
+    def _sorted_index(self, attr):
+        try:
+            return self._sorted[attr]
+        except KeyError:
+            pass
+
+        numbers, others, strings = [], [], []
+
+        for eid in self._attrs[attr]:
+            attrval = self.entries[eid][attr]
+
+            # Binary values never match an ordering test, as in match().
+            for value in attrval if isinstance(attrval, (list, tuple)) else [attrval]:
+                if not isinstance(value, (str, int, float)):
+                    continue
+
+                string = str(value)
+                strings.append((string, eid))
+
+                try:
+                    numbers.append((int(value), eid))
+                except (ValueError, OverflowError):
+                    others.append((string, eid))
+
+        index = tuple(_sorted_pairs(pairs) for pairs in (numbers, others, strings))
+        self._sorted[attr] = index
+        return index
+
+    def _approx_index(self, attr, matcher):
+        try:
+            return self._approx[attr][matcher]
+        except KeyError:
+            pass
+
+        index = defaultdict(set)
+
+        for eid in self._attrs[attr]:
+            attrval = self.entries[eid][attr]
+
+            # Binary values are skipped as in match(). Any other value without
+            # a key ends the comparison there, so the values after it never
+            # count.
+            for value in attrval if isinstance(attrval, (list, tuple)) else [attrval]:
+                if value.__class__ is bytes:
+                    continue
+
+                try:
+                    index[matcher.key(value)].add(eid)
+                except _ERRORS:
+                    break
+
+        self._approx[attr][matcher] = index
+        return index
+
+    def _all(self):
+        if self._universe is None:
+            self._universe = frozenset(range(len(self.entries)))
+
+        return self._universe
+
+
+_ERRORS = (AttributeError, TypeError, ValueError, IndexError)
+_PRESENT = _compile_test('=', '*')
+
+
+def _safe(test, attrval):
+    try:
+        return test(attrval)
+    except _ERRORS:
+        return False
+
+
+def _grams(value, size):
+    return set(value[i:i + size] for i in range(len(value) - size + 1))
+
+
+def _sorted_pairs(pairs):
+    pairs.sort()
+
+    return [k for k, _ in pairs], [i for _, i in pairs]
+
+
+def _range(index, comp, val):
+    keys, ids = index
+
+    if comp == '<=':
+        return set(ids[:bisect_right(keys, val)])
+
+    return set(ids[bisect_left(keys, val):])
@@ -0,0 +1,183 @@
+"""Streaming LDIF reader.
+
+Entries are read one at a time, so a dump of any size can be matched with
+constant memory. Each entry is a dictionary in the shape ``Filter.match``
+expects: attribute names map to a string, or to a list of strings when the
+attribute has several values. The distinguished name is stored under ``dn``.
+
+Folded lines, base64 (``::``) values, comments and the ``version`` line are
+handled. ``:<`` URL values are returned as the URL. Base64 values that are
+not UTF-8 text are returned as bytes; substring and approximate tests never
+match them.
+
+``write_ldif`` writes entries of the same shape back out.
+"""
+
+import base64
+import binascii
+import mmap
+import os
+import re
+
+from ldap_filter.filter import Filter
+
+
+class LDIFError(ValueError):
+    pass
+
+
+def read_ldif(source):
+    """Yield the entries of an LDIF file.
+
+    ``source`` is a path, which is memory mapped, or an iterable of lines
+    such as an open file in binary or text mode.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from _read_entries(_mapped_lines(f))
+    else:
+        yield from _read_entries(source)
+
+
+def filter_ldif(source, filt):
+    """Yield the entries of an LDIF file that match ``filt``."""
+    if isinstance(filt, str):
+        filt = Filter.parse(filt)
+
+    predicate = filt.compile()
+
+    for entry in read_ldif(source):
+        if predicate(entry):
+            yield entry
+
+
+def write_ldif(entries, stream):
+    """Write entries to a text stream, separated by blank lines."""
+    for entry in entries:
+        stream.write(format_entry(entry))
+        stream.write('\n')
+
+
+def format_entry(entry):
+    lines = []
+    items = sorted(entry.items(), key=lambda item: item[0] != 'dn')
+
+    for attr, attrval in items:
+        for value in attrval if isinstance(attrval, (list, tuple)) else [attrval]:
+            lines.append(_format_value(attr, value))
+
+    return ''.join(lines)
+
+
+def _format_value(attr, value):
+    if isinstance(value, bytes):
+        return '{}:: {}\n'.format(attr, base64.b64encode(value).decode('ascii'))
+
+    value = str(value)
+
+    if _UNSAFE.search(value):
+        return '{}:: {}\n'.format(attr, base64.b64encode(value.encode('utf-8')).decode('ascii'))
+
+    return '{}: {}\n'.format(attr, value)
+
+
+# RFC 2849 SAFE-STRING: ASCII without NUL, CR or LF that does not start with
+# a space, colon or less-than sign. Trailing spaces would be lost as well.
+_UNSAFE = re.compile(r'^[ :<]|[^\x01-\x09\x0b\x0c\x0e-\x7f]| $')
+
+
+def _mapped_lines(f):
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        # Empty files and pipes cannot be mapped.
+        yield from f
+        return
+
+    with mapped:
+        yield from iter(mapped.readline, b'')
+
+
+def _read_entries(lines):
+    entry = {}
+    parts = None
+    comment = False
+    first = True
+    line_no = 0
+
+    for line in lines:
+        line_no += 1
+        line = line.rstrip(b'\r\n' if isinstance(line, bytes) else '\r\n')
+
+        if line[:1] in (' ', b' '):
+            if parts is not None:
+                parts.append(line[1:])
+            elif not comment:
+                raise LDIFError('Line {}: continuation without a preceding line'.format(line_no))
+            continue
+
+        if parts is not None:
+            first = _add(entry, parts, first, line_no - 1)
+            parts = None
+
+        comment = line[:1] in ('#', b'#')
+
+        if not line:
+            if entry:
+                yield entry
+                entry = {}
+        elif not comment:
+            parts = [line]
+
+    if parts is not None:
+        _add(entry, parts, first, line_no)
+
+    if entry:
+        yield entry
+
+
+def _add(entry, parts, first, line_no):
+    line = parts[0][:0].join(parts)
+
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+
+    # Separator between the parts of a change record.
+    if line == '-':
+        return False
+
+    attr, sep, value = line.partition(':')
+
+    if not sep or not attr:
+        raise LDIFError('Line {}: expected "attribute: value"'.format(line_no))
+
+    if value[:1] == ':':
+        try:
+            value = base64.b64decode(value[1:].strip(), validate=True)
+        except binascii.Error:
+            raise LDIFError('Line {}: invalid base64 value for {}'.format(line_no, attr))
+
+        try:
+            value = value.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+    elif value[:1] == '<':
+        value = value[1:].strip()
+    else:
+        value = value.lstrip(' ')
+
+    # A version line is only allowed before the first record.
+    if first and not entry and attr.lower() == 'version':
+        return False
+
+    try:
+        current = entry[attr]
+    except KeyError:
+        entry[attr] = value
+    else:
+        if isinstance(current, list):
+            current.append(value)
+        else:
+            entry[attr] = [current, value]
+
+    return False
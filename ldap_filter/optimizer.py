@@ -0,0 +1,172 @@
+"""Algebraic rewrites for filter trees.
+
+``optimize`` rebuilds a tree bottom-up and applies rewrites that hold for
+every entry, including entries with multi-valued attributes:
+
+* nested groups of the same operator are flattened and duplicates removed,
+* double negation is folded,
+* ``(&A(!A))`` becomes the absolute false filter ``(|)`` and ``(|A(!A))`` the
+  absolute true filter ``(&)`` (RFC 4526), and constants are propagated,
+* ``(&A(|A B))`` and ``(|A(&A B))`` are absorbed into ``A``,
+* ``<=``/``>=`` bounds on the same attribute keep only the tightest (AND)
+  or loosest (OR) bound when the bounds are ordered the same way both
+  numerically and as strings, which is how ``match`` compares them.
+
+Range bounds in opposite directions and equalities on the same attribute are
+left alone; an attribute with several values can satisfy all of them.
+"""
+
+
+def optimize(filt):
+    if filt.type == 'filter':
+        return type(filt)(filt.attr, filt.comp, filt.val, filt.matcher)
+
+    if filt.comp == '!':
+        return _optimize_not(filt)
+    elif filt.comp in ('&', '|'):
+        return _optimize_group(filt)
+
+    return type(filt)(filt.comp, [optimize(f) for f in filt.filters])
+
+
+def is_true(filt):
+    return filt.type == 'group' and filt.comp == '&' and not filt.filters
+
+
+def is_false(filt):
+    return filt.type == 'group' and filt.comp == '|' and not filt.filters
+
+
+def _optimize_not(filt):
+    if len(filt.filters) == 1:
+        child = optimize(filt.filters[0])
+    else:
+        child = optimize(filt.OR(list(filt.filters)))
+
+    if is_true(child):
+        return filt.OR([])
+    elif is_false(child):
+        return filt.AND([])
+    elif _is_not(child):
+        return child.filters[0]
+
+    return filt.NOT(child)
+
+
+def _optimize_group(filt):
+    comp = filt.comp
+    absorbing = is_false if comp == '&' else is_true
+    neutral = is_true if comp == '&' else is_false
+
+    children = []
+    for f in filt.filters:
+        f = optimize(f)
+
+        if absorbing(f):
+            return f
+        elif neutral(f):
+            continue
+        elif f.type == 'group' and f.comp == comp:
+            children.extend(f.filters)
+        else:
+            children.append(f)
+
+    children = _dedupe(children)
+    keys = set(_key(f) for f in children)
+
+    # A and not A, A or not A.
+    for f in children:
+        if _is_not(f) and _key(f.filters[0]) in keys:
+            return filt.OR([]) if comp == '&' else filt.AND([])
+
+    children = _absorb(children, keys, '|' if comp == '&' else '&')
+    children = _merge_bounds(children, comp)
+
+    if not children:
+        return filt.AND([]) if comp == '&' else filt.OR([])
+    elif len(children) == 1:
+        return children[0]
+
+    return filt.AND(children) if comp == '&' else filt.OR(children)
+
+
+def _dedupe(children):
+    seen = set()
+    result = []
+
+    for f in children:
+        key = _key(f)
+        if key not in seen:
+            seen.add(key)
+            result.append(f)
+
+    return result
+
+
+def _absorb(children, keys, inner):
+    result = []
+
+    for f in children:
+        if f.type == 'group' and f.comp == inner and any(_key(c) in keys for c in f.filters):
+            continue
+        result.append(f)
+
+    return result
+
+
+def _merge_bounds(children, comp):
+    bounds = {}
+
+    for f in children:
+        if f.type == 'filter' and f.comp in ('<=', '>='):
+            bounds.setdefault((f.attr, f.comp), []).append(f)
+
+    dropped = set()
+
+    for group in bounds.values():
+        for f in group:
+            for g in group:
+                if f is g or id(f) in dropped or id(g) in dropped:
+                    continue
+
+                if _implies(f, g):
+                    # AND keeps the stronger bound, OR the weaker one.
+                    dropped.add(id(g) if comp == '&' else id(f))
+
+    return [f for f in children if id(f) not in dropped]
+
+
+def _implies(f, g):
+    a, b = f.val, g.val
+
+    if a == b:
+        return False
+
+    a_number = _to_int(a)
+    b_number = _to_int(b)
+
+    if (a_number is None) != (b_number is None):
+        return False
+
+    if f.comp == '>=':
+        return a >= b and (a_number is None or a_number >= b_number)
+
+    return a <= b and (a_number is None or a_number <= b_number)
+
+
+def _to_int(val):
+    try:
+        return int(val)
+    except ValueError:
+        return None
+
+
+def _is_not(filt):
+    return filt.type == 'group' and filt.comp == '!' and len(filt.filters) == 1
+
+
+def _key(filt):
+    if filt.type == 'filter':
+        return filt.attr, filt.comp, filt.val, filt.matcher
+
+    return filt.comp, tuple(_key(f) for f in filt.filters)
@@ -0,0 +1,112 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+import ldap_filter.approx as approx
+
+
+_predicate = None
+
+
+def match_parallel(filt, records, workers=None, chunksize=1000, ordered=True, mp_context=None):
+    """Evaluate ``filt`` against ``records`` in a pool of worker processes.
+
+    The filter is pickled once per worker and compiled there, along with
+    ``Filter.approx_matcher`` and the registered approximate matchers its
+    ``~=`` tests name, so workers match as this process does whatever the
+    start method of ``mp_context``. Records are
+    streamed to the pool in chunks of ``chunksize`` with at most two chunks
+    in flight per worker, so arbitrarily large iterables can be processed.
+
+    With ``ordered=True`` one boolean is yielded per record, in input order.
+    With ``ordered=False`` ``(index, matched)`` pairs are yielded as soon as
+    their chunk completes.
+    """
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+
+    workers = workers or os.cpu_count() or 1
+    limit = workers * 2
+
+    initargs = (filt,) + _matchers(filt)
+
+    with ProcessPoolExecutor(workers, mp_context, _init_worker, initargs) as executor:
+        chunks = _chunks(records, chunksize)
+
+        if ordered:
+            pending = deque()
+
+            for start, chunk in chunks:
+                pending.append(executor.submit(_match_chunk, chunk))
+
+                while len(pending) >= limit:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            pending = {}
+
+            for start, chunk in chunks:
+                pending[executor.submit(_match_chunk, chunk)] = start
+
+                while len(pending) >= limit:
+                    yield from _drain(pending, wait(pending, return_when=FIRST_COMPLETED).done)
+
+            while pending:
+                yield from _drain(pending, wait(pending, return_when=FIRST_COMPLETED).done)
+
+
+def _chunks(records, chunksize):
+    records = iter(records)
+    start = 0
+
+    while True:
+        chunk = list(islice(records, chunksize))
+
+        if not chunk:
+            return
+
+        yield start, chunk
+        start += len(chunk)
+
+
+def _drain(pending, done):
+    for future in done:
+        start = pending.pop(future)
+
+        for i, matched in enumerate(future.result(), start):
+            yield i, matched
+
+
+def _matchers(filt):
+    from ldap_filter.filter import Filter
+
+    named = {}
+    stack = [filt]
+
+    while stack:
+        node = stack.pop()
+
+        if node.filters is not None:
+            stack.extend(node.filters)
+        elif node.comp == '~=' and isinstance(node.matcher, str):
+            named[node.matcher] = approx.get(node.matcher)
+
+    return approx.get(Filter.approx_matcher), named
+
+
+def _init_worker(filt, matcher, named):
+    from ldap_filter.filter import Filter
+
+    global _predicate
+    approx.MATCHERS.update(named)
+    Filter.approx_matcher = matcher
+    _predicate = filt.compile()
+
+
+def _match_chunk(records):
+    predicate = _predicate
+
+    return [predicate(r) for r in records]
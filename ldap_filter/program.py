@@ -0,0 +1,223 @@
+"""Flat, array-backed form of a filter.
+
+``lower`` turns a filter tree into a ``Program``: a contiguous array of
+fixed width instructions and two constant pools, the attribute names and
+the ``(comp, val, matcher)`` operands of the tests. ``Program.match``
+evaluates it in a single loop with one accumulator, so no Python object is
+visited per node and the depth of the filter is not limited by the
+recursion limit.
+
+Every instruction is three integers, an opcode and two arguments:
+
+    TEST attr operand     acc = the test on the attribute, False if absent
+    JUMP_IF_FALSE target  jump when acc is false, the short circuit of AND
+    JUMP_IF_TRUE target   jump when acc is true, the short circuit of OR
+    CONST value           acc = bool(value)
+    NOT                   acc = not acc
+
+Jump targets are offsets into the array. As in ``match``, an
+``AttributeError`` raised by a test inside a NOT counts as a false result of
+that child. The table of these handlers is part of the program.
+
+Programs pickle to the arrays and pools only; the tests are rebuilt from
+the operands when a program is loaded.
+"""
+
+from array import array
+
+from ldap_filter.filter import Filter, _compile_test
+
+TEST = 0
+JUMP_IF_FALSE = 1
+JUMP_IF_TRUE = 2
+CONST = 3
+NOT = 4
+
+WIDTH = 3
+
+
+class Program:
+    def __init__(self, code, attrs, operands, handlers):
+        self.code = code
+        self.attrs = attrs
+        self.operands = operands
+        self.handlers = handlers
+        self._compile()
+
+    def _compile(self):
+        # Approximate tests without a matcher of their own use the global
+        # one, so the tests are rebuilt when it changes.
+        self._approx = Filter.approx_matcher
+        self._tests = tuple(_compile_test(comp, val, matcher) for comp, val, matcher in self.operands)
+
+    def __len__(self):
+        return len(self.code) // WIDTH
+
+    def __eq__(self, other):
+        if not isinstance(other, Program):
+            return NotImplemented
+
+        return (self.code, self.attrs, self.operands, self.handlers) == \
+            (other.code, other.attrs, other.operands, other.handlers)
+
+    def __reduce__(self):
+        return Program, (self.code, self.attrs, self.operands, self.handlers)
+
+    def match(self, data):
+        if self._approx is not Filter.approx_matcher:
+            self._compile()
+
+        code = self.code
+        attrs = self.attrs
+        tests = self._tests
+        end = len(code)
+        acc = False
+        pc = 0
+
+        while pc < end:
+            try:
+                while pc < end:
+                    op = code[pc]
+
+                    if op == TEST:
+                        try:
+                            attrval = data[attrs[code[pc + 1]]]
+                        except KeyError:
+                            acc = False
+                        else:
+                            acc = tests[code[pc + 2]](attrval)
+                        pc += WIDTH
+                    elif op == JUMP_IF_FALSE:
+                        pc = pc + WIDTH if acc else code[pc + 1]
+                    elif op == JUMP_IF_TRUE:
+                        pc = code[pc + 1] if acc else pc + WIDTH
+                    elif op == NOT:
+                        acc = not acc
+                        pc += WIDTH
+                    else:
+                        acc = code[pc + 1] != 0
+                        pc += WIDTH
+            except AttributeError:
+                handler = self.handlers[pc // WIDTH]
+
+                if handler < 0:
+                    raise
+
+                acc = False
+                pc = handler
+
+        return bool(acc)
+
+    def match_many(self, records):
+        match = self.match
+
+        return (match(r) for r in records)
+
+    def filter_records(self, records):
+        match = self.match
+
+        return (r for r in records if match(r))
+
+    def disassemble(self):
+        names = {TEST: 'TEST', JUMP_IF_FALSE: 'JUMP_IF_FALSE', JUMP_IF_TRUE: 'JUMP_IF_TRUE', CONST: 'CONST', NOT: 'NOT'}
+        code = self.code
+        lines = []
+
+        for pc in range(0, len(code), WIDTH):
+            op, a, b = code[pc:pc + WIDTH]
+
+            if op == TEST:
+                comp, val, matcher = self.operands[b]
+                args = '({}{}{})'.format(self.attrs[a], comp, val)
+            elif op == NOT:
+                args = ''
+            else:
+                args = str(a)
+
+            lines.append('{:>6} {} {}'.format(pc, names[op], args).rstrip())
+
+        return '\n'.join(lines)
+
+
+def lower(filt):
+    """Lower a filter tree into a ``Program``."""
+    code = array('i')
+    attrs = {}
+    operands = {}
+    regions = []
+    work = [('node', filt)]
+
+    def emit(op, a=0, b=0):
+        code.extend((op, a, b))
+
+    while work:
+        kind, item = work.pop()
+
+        if kind == 'node':
+            if item.type == 'filter':
+                attr = attrs.setdefault(item.attr, len(attrs))
+                operand = operands.setdefault((item.comp, item.val, item.matcher), len(operands))
+                emit(TEST, attr, operand)
+                continue
+
+            children = list(item.filters)
+
+            if not children:
+                emit(CONST, int(item.comp != '|'))
+                continue
+
+            # [comp, jumps to patch, start of the current NOT child]
+            group = [item.comp, [], 0]
+            steps = []
+
+            for i, child in enumerate(children):
+                if item.comp == '!':
+                    steps.extend((('try', group), ('node', child), ('except', group)))
+                else:
+                    steps.append(('node', child))
+
+                if i < len(children) - 1:
+                    steps.append(('jump', group))
+
+            steps.append(('end', group))
+            work.extend(reversed(steps))
+        elif kind == 'try':
+            item[2] = len(code)
+        elif kind == 'except':
+            regions.append((item[2], len(code)))
+        elif kind == 'jump':
+            item[1].append(len(code))
+            emit(JUMP_IF_FALSE if item[0] == '&' else JUMP_IF_TRUE)
+        else:
+            for pc in item[1]:
+                code[pc + 1] = len(code)
+
+            if item[0] == '!':
+                emit(NOT)
+
+    return Program(code, tuple(attrs), tuple(operands), _handlers(regions, len(code) // WIDTH))
+
+
+def _handlers(regions, size):
+    # Regions nest, so a sweep over them outermost first with a stack of the
+    # open ones gives the innermost handler of each instruction.
+    handlers = array('i', [-1]) * size
+    regions.sort(key=lambda region: (region[0], -region[1]))
+    stack = []
+    i = 0
+
+    for index in range(size):
+        pc = index * WIDTH
+
+        while stack and stack[-1][1] <= pc:
+            stack.pop()
+
+        while i < len(regions) and regions[i][0] <= pc:
+            if regions[i][1] > pc:
+                stack.append(regions[i])
+            i += 1
+
+        if stack:
+            handlers[index] = stack[-1][1]
+
+    return handlers
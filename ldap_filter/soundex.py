@@ -1,20 +1,36 @@
 import re
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+
+_DIGITS = str.maketrans('BFPVCGJKQSXZDTLMNR', '111122222222334556')
+_VOWELS = str.maketrans('', '', 'AEIOUYHW')
+_UNCODED = re.compile(r'[^BFPVCGJKQSXZDTLMNR]+')
 
 
 def soundex(string, scale=4):
+    try:
+        return _cached(string, scale)
+    except TypeError:
+        return _soundex(string, scale)
+
+
+def soundex_compare(val1, val2):
+    return soundex(val1) == soundex(val2)
+
+
+def _soundex(string, scale):
     string = string.upper()
-    code = string[0]
-    string = re.sub(r'[AEIOUYHW]', '', string)
-    chr_key = {'BFPV': '1', 'CGJKQSXZ': '2', 'DT': '3', 'L': '4', 'MN': '5', 'R': '6'}
+    code = last = string[0]
 
-    for c in string[1:]:
-        for k, v in chr_key.items():
-            if (c in k) and (v != code[-1]):
-                code += v
-                break
+    # Vowels are dropped before the first letter is skipped, and characters
+    # outside the coded classes are ignored without separating duplicates.
+    for digit in _UNCODED.sub('', string.translate(_VOWELS)[1:]).translate(_DIGITS):
+        if digit != last:
+            code += digit
+            last = digit
 
     return code.ljust(scale, '0')
 
 
-def soundex_compare(val1, val2):
-    return soundex(val1) == soundex(val2)
+_cached = lru_cache(maxsize=CACHE_SIZE)(_soundex)
@@ -0,0 +1,31 @@
+import importlib.util
+import os
+
+RUNNER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'run.py')
+
+spec = importlib.util.spec_from_file_location('benchmarks_run', RUNNER)
+run = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run)
+
+
+class TestBenchmarks:
+    def test_benchmarks_run(self):
+        names = []
+
+        for name, func in run.discover():
+            func()
+            names.append(name)
+
+        assert 'bench_parse.time_parse_wide' in names
+        assert 'bench_match.time_approx_multi' in names
+        assert 'bench_memory.mem_leaf_10000' in names
+
+    def test_measure(self):
+        result = run.measure(lambda: None, repeat=2, min_time=0.001)
+        assert result['min'] <= result['median']
+        assert result['number'] >= 1
+
+    def test_measure_memory(self):
+        result = run.measure_memory(lambda: [bytearray(1000) for _ in range(10)])
+        assert result['bytes'] >= 10000
+        assert run.format_result(result).endswith('kB')
@@ -0,0 +1,128 @@
+import pytest
+from ldap_filter import Filter
+from ldap_filter import EntryIndex
+from ldap_filter import approx
+
+
+NAMES = ['Stewart', 'Stuart', 'Smith', 'Smyth', 'Schmidt', 'Knight', 'Night', 'Brown', 'Browne', 'Jon', 'John', 'Jonathan']
+
+
+class TestApproxMatchers:
+    def test_metaphone(self):
+        assert approx.metaphone('Knight') == 'NT'
+        assert approx.metaphone('Smith') == 'SM0'
+        assert approx.metaphone('Schmidt') == 'SKMTT'
+        assert approx.metaphone('Mitchell') == 'MXL'
+        assert approx.metaphone('') == ''
+
+    def test_nysiis(self):
+        assert approx.nysiis('Brian') == 'BRAN'
+        assert approx.nysiis('Knight') == 'NAGT'
+        assert approx.nysiis('Mitchell') == 'MATCAL'
+        assert approx.nysiis("O'Daniel") == 'ODANAL'
+        assert approx.nysiis('Macintosh') == 'MCANT'
+        assert approx.nysiis('') == ''
+
+    def test_edit_distance(self):
+        assert approx.edit_distance('kitten', 'sitting') == 3
+        assert approx.edit_distance('', 'abc') == 3
+        assert approx.EditDistance(0.25).match('Jon', 'john')
+        assert not approx.EditDistance(0.25).match('Jon', 'Jonathan')
+
+    def test_get(self):
+        matcher = approx.EditDistance(0.5)
+        assert approx.get(matcher) is matcher
+        assert isinstance(approx.get('nysiis'), approx.Nysiis)
+        with pytest.raises(ValueError):
+            approx.get('unknown')
+
+
+class TestApproxFilters:
+    @pytest.mark.parametrize('matcher', ['soundex', 'metaphone', 'nysiis', 'edit_distance'])
+    def test_match_compile_and_index(self, matcher):
+        data = [{'sn': name} for name in NAMES] + [{'sn': ['x', 'Smithe']}, {'sn': 5}, {}]
+        index = EntryIndex(data)
+
+        for name in NAMES:
+            filt = Filter.attribute('sn').approx(name, matcher)
+            compiled = filt.compile()
+            expected = set()
+
+            for i, entry in enumerate(data):
+                try:
+                    result = filt.match(entry)
+                except AttributeError:
+                    continue
+
+                assert compiled(entry) == result
+                if result:
+                    expected.add(i)
+
+            assert index.search_ids(filt) == expected
+            assert filt.freeze().match({'sn': name})
+
+    @pytest.mark.parametrize('matcher', ['soundex', 'metaphone', 'nysiis'])
+    def test_empty_key_never_matches(self, matcher):
+        data = [{'tel': '999-0000'}, {'tel': '+1 (212) 000'}, {'tel': ['-', 'x']}]
+        index = EntryIndex(data)
+        filt = Filter.attribute('tel').approx('555-1234', matcher)
+        compiled = filt.compile()
+
+        for entry in data:
+            assert not filt.match(entry)
+            assert not compiled(entry)
+
+        assert index.search_ids(filt) == set()
+        assert not approx.get(matcher).match('42', '99')
+
+    def test_index_skips_binary_values(self):
+        data = [{'cn': [b'\xff\xd8', 'Ashcroft']}]
+        filt = Filter.parse('(cn~=ashcraft)')
+        assert filt.match(data[0])
+        assert EntryIndex(data).search_ids(filt) == {0}
+
+    def test_global_matcher(self):
+        filt = Filter.parse('(sn~=robert)')
+        assert filt.match({'sn': 'Rupert'})
+
+        try:
+            Filter.approx_matcher = 'metaphone'
+            assert not filt.match({'sn': 'Rupert'})
+            assert filt.compile()({'sn': 'Robbert'})
+        finally:
+            Filter.approx_matcher = 'soundex'
+
+    def test_global_matcher_frozen(self):
+        frozen = Filter.parse('(&(objectClass=person)(sn~=Rupert))').freeze()
+        entry = {'objectClass': 'person', 'sn': 'Robert'}
+        assert frozen.match(entry)
+
+        try:
+            Filter.approx_matcher = 'edit_distance'
+            assert not frozen.match(entry)
+            assert not Filter.parse('(&(objectClass=person)(sn~=Rupert))').freeze().match(entry)
+        finally:
+            Filter.approx_matcher = 'soundex'
+
+        assert frozen.match(entry)
+
+    def test_per_filter_matcher(self):
+        metaphone = Filter.attribute('sn').approx('smith', 'metaphone')
+        soundex = Filter.attribute('sn').approx('smith')
+        assert metaphone.freeze() is not soundex.freeze()
+        assert Filter.OR([metaphone, soundex]).optimize().to_string() == '(|(sn~=smith)(sn~=smith))'
+
+    def test_register(self):
+        class Initial(approx.ApproxMatcher):
+            def key(self, value):
+                return value[:1].lower()
+
+        approx.register('initial', Initial())
+
+        try:
+            filt = Filter.attribute('sn').approx('s', 'initial')
+            assert filt.match({'sn': 'Stuart'})
+            assert not filt.match({'sn': 'Brown'})
+            assert EntryIndex([{'sn': 'Brown'}, {'sn': 'smith'}]).search_ids(filt) == {1}
+        finally:
+            del approx.MATCHERS['initial']
@@ -0,0 +1,128 @@
+import pytest
+from ldap_filter import Filter
+from ldap_filter.ber import BERError, decode, encode
+from ldap_filter.filter import GroupAnd, GroupNot, GroupOr
+
+
+class TestFilterBER:
+    filters = [
+        '(sn=smith)',
+        '(&(objectClass=person)(|(department=sales)(department=hr))(!(status=terminated)))',
+        '(|(mail=*@example.com)(cn=a*b*c)(cn=*mid*)(cn=start*)(cn~=jon)(age>=18)(age<=65)(cn=*))',
+    ]
+
+    def test_round_trip(self):
+        for string in self.filters:
+            data = Filter.parse(string).to_ber()
+            assert Filter.from_ber(data).to_ber() == data
+            assert Filter.from_ber(data).to_string() == Filter.parse(string).to_string()
+
+    def test_known_encodings(self):
+        assert Filter.parse('(cn=Babs)').to_ber() == bytes.fromhex('a30a0402636e0404') + b'Babs'
+        assert Filter.parse('(cn=*)').to_ber() == b'\x87\x02cn'
+        assert Filter.parse('(cn=a*b)').to_ber() == bytes.fromhex('a40c0402636e3006800161820162')
+        assert GroupAnd([]).to_ber() == b'\xa0\x00'
+        assert GroupOr([]).to_ber() == b'\xa1\x00'
+
+    def test_extensible(self):
+        filt = Filter('cn:dn:caseExactMatch', ':=', 'Fred')
+        data = filt.to_ber()
+        assert data == bytes.fromhex('a91d810e') + b'caseExactMatch' + b'\x82\x02cn\x83\x04Fred\x84\x01\xff'
+        assert Filter.from_ber(data).to_string() == '(cn:dn:caseExactMatch:=Fred)'
+        assert Filter.from_ber(Filter(':dn:2.4.6.8.10', ':=', 'Dino').to_ber()).to_string() == '(:dn:2.4.6.8.10:=Dino)'
+
+    def test_parsed_extensible(self):
+        for string in ('(cn:dn:caseExactMatch:=Fred)', '(:dn:2.4.6.8.10:=Dino)', '(sn:=x)'):
+            data = Filter.parse(string).to_ber()
+            assert data[0] == 0xa9
+            assert Filter.from_ber(data).to_string() == string
+            assert Filter.parse(Filter.from_ber(data).to_string()).to_ber() == data
+
+        assert Filter.parse('(cn:dn:caseExactMatch:=Fred)').to_ber() == \
+            Filter('cn:dn:caseExactMatch', ':=', 'Fred').to_ber()
+
+    def test_escaped_values(self):
+        filt = Filter.attribute('cn').equal_to('a*b(c)\\')
+        data = filt.to_ber()
+        assert data.endswith(b'\x04\x07a*b(c)\\')
+        decoded = Filter.from_ber(data)
+        assert decoded.val == 'a\\2ab\\28c\\29\\5c'
+        assert decoded.to_ber() == data
+        assert decoded.match({'cn': 'a*b(c)\\'})
+
+    def test_string_round_trip_keeps_specials_escaped(self):
+        for value in ['x)(uid=*', 'a(b', 'nul\x00', 'x)(uid=*)(|(a=b']:
+            data = Filter.attribute('cn').equal_to(value).to_ber()
+            string = Filter.OR([Filter.from_ber(data)]).to_string()
+            parsed = Filter.parse(string)
+            assert len(parsed.filters) == 1
+            assert parsed.filters[0].to_ber() == data
+            assert parsed.filters[0].match({'cn': value})
+
+    def test_parsed_escapes(self):
+        cases = [
+            ('(cn=a\\2ab)', b'\xa3\x09\x04\x02cn\x04\x03a*b'),
+            ('(cn=\\5c41)', b'\xa3\x09\x04\x02cn\x04\x03\\41'),
+            ('(cn=\\28x\\29)', b'\xa3\x09\x04\x02cn\x04\x03(x)'),
+            ('(cn=a\\2A*\\5c)', b'\xa4\x0d\x04\x02cn\x30\x07\x80\x02a*\x82\x01\\'),
+            ('(cn=caf\\c3\\a9\\00)', b'\xa3\x0c\x04\x02cn\x04\x06caf\xc3\xa9\x00'),
+            ('(cn=\\ff\\c3)', b'\xa3\x08\x04\x02cn\x04\x02\xff\xc3'),
+        ]
+        for string, data in cases:
+            parsed = Filter.parse(string)
+            assert parsed.to_ber() == data
+            decoded = Filter.from_ber(data)
+            assert decoded.val == parsed.val
+
+        # Escapes of '*', '\\' and non UTF-8 octets are kept in string output.
+        for string, data in cases[:2] + cases[3:4] + cases[5:]:
+            assert Filter.parse(Filter.from_ber(data).to_string()).to_ber() == data
+
+    def test_invalid_utf8_values(self):
+        filt = Filter.from_ber(bytes.fromhex('a3080402636e0402ff41'))
+        assert filt.val == '\\ffA'
+        assert filt.to_ber() == bytes.fromhex('a3080402636e0402ff41')
+
+    def test_not(self):
+        filt = GroupNot([Filter('a', '=', '1'), Filter('b', '=', '2')])
+        assert Filter.from_ber(filt.to_ber()).to_string() == '(!(|(a=1)(b=2)))'
+
+        with pytest.raises(BERError):
+            Filter.from_ber(b'\xa2\x00')
+
+    def test_long_lengths(self):
+        filt = Filter.OR([Filter('uid', '=', 'x' * 70000), Filter('uid', '=', 'y' * 200)])
+        data = filt.to_ber()
+        assert data[1] == 0x83
+        assert Filter.from_ber(data).to_string() == filt.to_string()
+
+    def test_deep(self):
+        filt = Filter('cn', '=', 'a')
+        for i in range(5000):
+            filt = GroupNot([filt]) if i % 2 else GroupAnd([filt])
+        data = encode(filt)
+        assert encode(Filter.from_ber(data)) == data
+
+    def test_buffers(self):
+        data = Filter.parse(self.filters[1]).to_ber()
+        for buf in (bytearray(data), memoryview(data)):
+            assert Filter.from_ber(buf).to_string() == Filter.parse(self.filters[1]).to_string()
+
+    def test_offset(self):
+        first = Filter.parse('(a=1)').to_ber()
+        second = Filter.parse('(|(b=2)(c=3))').to_ber()
+        filt, end = decode(first + second, len(first))
+        assert filt.to_string() == '(|(b=2)(c=3))'
+        assert end == len(first) + len(second)
+
+    def test_damaged(self):
+        data = Filter.parse(self.filters[1]).to_ber()
+
+        for damaged in (data[:-1], data + b'\x00', b'\xa3\x02\x04\x00', b'\xff\x00', b'\xa0\x85\x00\x00\x00\x00\x01',
+                        b'\xa4\x06\x04\x02cn\x30\x00'):
+            with pytest.raises(BERError):
+                Filter.from_ber(damaged)
+
+    def test_unknown_operator(self):
+        with pytest.raises(BERError):
+            Filter('cn', '!=', 'a').to_ber()
@@ -63,6 +63,37 @@ class TestFilterEscapes:
         string = filt.to_string()
         assert string == '(escaped=a \\2a \\28complex\\29 \\5cvalue)'
 
+    def test_escape_null(self):
+        assert Filter.escape('a\x00b') == 'a\\00b'
+
+    def test_escape_many(self):
+        values = Filter.escape_many(['a*b', '(c)', '', 'd\\'])
+        assert values == ['a\\2ab', '\\28c\\29', '', 'd\\5c']
+
+    def test_escape_many_separator(self):
+        values = Filter.escape_many(['line\none*', 'two'])
+        assert values == ['line\none\\2a', 'two']
+
+    def test_escape_many_empty(self):
+        assert Filter.escape_many([]) == []
+
+    def test_unescape_any_hex(self):
+        assert Filter.unescape('\\41\\2A\\7e') == 'A*~'
+
+    def test_unescape_utf8(self):
+        assert Filter.unescape('caf\\c3\\a9') == 'caf\u00e9'
+
+    def test_unescape_invalid_utf8(self):
+        assert Filter.unescape('\\ff\\c3\\a9\\c3') == '\u00ff\u00e9\u00c3'
+
+    def test_unescape_single_pass(self):
+        assert Filter.unescape('\\5c2a') == '\\2a'
+
+    def test_equal_to_any(self):
+        filt = Filter.attribute('uid').equal_to_any(['a*', 'b', 3])
+        string = filt.to_string()
+        assert string == '(|(uid=a\\2a)(uid=b)(uid=3))'
+
     def test_filter_convert_int(self):
         filt = Filter.attribute('number').equal_to(1000)
         string = filt.to_string()
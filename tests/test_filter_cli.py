@@ -0,0 +1,104 @@
+import io
+import json
+import pytest
+from ldap_filter.cli import main
+
+
+LDIF = '''dn: uid=jdoe,dc=example,dc=com
+objectClass: person
+uid: jdoe
+mail: jdoe@example.com
+
+dn: uid=asmith,dc=example,dc=com
+objectClass: person
+uid: asmith
+
+dn: cn=admins,dc=example,dc=com
+objectClass: group
+cn: admins
+'''
+
+JSONL = '\n'.join(json.dumps(e) for e in [
+    {'dn': 'uid=jdoe', 'uid': 'jdoe', 'age': '42'},
+    {'dn': 'uid=bob', 'uid': 'bob', 'age': '17', 'photo': None},
+]) + '\n'
+
+
+def run(argv, data=b''):
+    stdout = io.StringIO()
+    status = main(argv, stdin=io.BytesIO(data), stdout=stdout)
+    return status, stdout.getvalue()
+
+
+class TestCLI:
+    def test_ldif_stdin(self):
+        status, output = run(['(objectClass=person)', '-o', 'dn'], LDIF.encode('utf-8'))
+        assert status == 0
+        assert output == 'uid=jdoe,dc=example,dc=com\nuid=asmith,dc=example,dc=com\n'
+
+    def test_ldif_output(self):
+        status, output = run(['(mail=*)'], LDIF.encode('utf-8'))
+        assert output == 'dn: uid=jdoe,dc=example,dc=com\nobjectClass: person\nuid: jdoe\nmail: jdoe@example.com\n\n'
+
+    def test_jsonl_stdin(self):
+        status, output = run(['(age>=18)'], JSONL.encode('utf-8'))
+        assert status == 0
+        assert [json.loads(line) for line in output.splitlines()] == [{'dn': 'uid=jdoe', 'uid': 'jdoe', 'age': '42'}]
+
+    def test_files(self, tmp_path):
+        ldif = tmp_path / 'people.ldif'
+        ldif.write_text(LDIF)
+        jsonl = tmp_path / 'people.data'
+        jsonl.write_text(JSONL)
+
+        assert run(['--count', '(uid=*)', str(ldif), str(jsonl)]) == (0, '4\n')
+        assert run(['-c', '-v', '(uid=*)', str(ldif), str(jsonl)]) == (0, '1\n')
+        assert run(['-c', '-f', 'ldif', '(uid=*)', str(ldif)]) == (0, '2\n')
+
+    def test_no_match(self):
+        assert run(['-c', '(uid=nobody)'], LDIF.encode('utf-8')) == (1, '0\n')
+
+    def test_workers(self, tmp_path):
+        ldif = tmp_path / 'people.ldif'
+        ldif.write_text(LDIF * 50)
+
+        assert run(['-c', '-j', '2', '--chunksize', '7', '(objectClass=person)', str(ldif)]) == (0, '100\n')
+
+    def test_errors(self, capsys):
+        assert run(['(uid=x'])[0] == 2
+        assert 'invalid filter' in capsys.readouterr().err
+        assert run(['(uid=x)', '/nonexistent.ldif'])[0] == 2
+        assert run(['(uid=x)', '-f', 'jsonl'], b'{not json}\n')[0] == 2
+
+    def test_json_scalars(self):
+        data = b'{"dn": "uid=5", "uid": 5, "score": 1.5, "admin": true, "mail": null, "tags": [7, null, "x"]}\n'
+
+        for filt in ('(uid=5)', '(uid=*5*)', '(score>=1)', '(admin=TRUE)', '(!(mail=*))', '(tags=7)', '(tags=*x*)'):
+            assert run(['-c', filt], data) == (0, '1\n'), filt
+
+        assert run(['(uid=5)'], data) == (0, data.decode('utf-8'))
+
+    def test_jsonl_output_is_unchanged(self):
+        data = b'{"uid":"a","uidNumber":1001,"enabled":true,"manager":null,"score":1.50}\r\n{"uid":"b"}\n'
+
+        assert run(['(uidNumber>=1000)'], data) == (0, '{"uid":"a","uidNumber":1001,"enabled":true,"manager":null,"score":1.50}\n')
+        assert run(['-j', '2', '(enabled=TRUE)'], data)[1] == run(['(enabled=TRUE)'], data)[1]
+        assert run(['-o', 'jsonl', '(uid=*)'], LDIF.encode('utf-8'))[1].splitlines()[0] == \
+            '{"dn": "uid=jdoe,dc=example,dc=com", "objectClass": "person", "uid": "jdoe", "mail": "jdoe@example.com"}'
+
+    def test_match_errors(self, capsys):
+        assert run(['(uid=*5*)', '-f', 'jsonl'], b'{"dn": "uid=x", "uid": {"a": 1}}\n')[0] == 2
+        assert 'cannot match uid=x' in capsys.readouterr().err
+        assert run(['(uid=x)', '-f', 'jsonl'], b'[1, 2]\n')[0] == 2
+
+    def test_binary_ldif(self):
+        data = LDIF.encode('utf-8') + b'\ndn: uid=photo,dc=example,dc=com\nuid: photo\njpegPhoto:: /9j/4A==\n'
+
+        assert run(['-c', '(jpegPhoto=*a*)'], data) == (1, '0\n')
+        assert run(['-c', '(jpegPhoto~=a)'], data) == (1, '0\n')
+        assert run(['-o', 'dn', '(jpegPhoto=*)'], data) == (0, 'uid=photo,dc=example,dc=com\n')
+        assert run(['(jpegPhoto=*)'], data)[1].endswith('jpegPhoto:: /9j/4A==\n\n')
+
+    def test_usage(self):
+        with pytest.raises(SystemExit):
+            run([])
@@ -0,0 +1,174 @@
+import pytest
+from ldap_filter import Filter
+from ldap_filter.codec import CodecError, decode, dumps, encode, loads
+from ldap_filter.diskcache import DiskCache
+from ldap_filter.filter import GroupAnd, GroupNot, GroupOr
+
+
+class TestFilterCodec:
+    filters = [
+        '(sn=smith)',
+        '(&(objectClass=person)(|(department=sales)(department=hr))(!(status=terminated)))',
+        '(|(mail=*@example.com)(cn~=jon)(age>=18)(age<=65))',
+        '(cn=caf\\c3\\a9 \\2a\\28\\29\\5c)',
+    ]
+
+    def test_round_trip(self):
+        for string in self.filters:
+            filt = Filter.parse(string)
+            decoded = loads(dumps(filt))
+            assert decoded.to_string() == filt.to_string()
+            assert decoded is not filt
+
+    def test_round_trip_frozen(self):
+        filt = Filter.parse(self.filters[1]).freeze()
+        assert loads(dumps(filt)).freeze() is filt
+
+    def test_empty_groups(self):
+        for filt in (GroupAnd([]), GroupOr([]), GroupNot([]), GroupAnd([GroupOr([]), Filter('a', '=', '1')])):
+            assert loads(dumps(filt)).to_string() == filt.to_string()
+
+    def test_separator_in_values(self):
+        filt = Filter.AND([Filter('a', '=', '\x00\x01'), Filter('b', '=', '\x02')])
+        decoded = loads(dumps(filt))
+        assert [f.val for f in decoded.filters] == ['\x00\x01', '\x02']
+
+    def test_matcher(self):
+        filt = Filter.attribute('sn').approx('smith', matcher='metaphone')
+        assert loads(dumps(filt)).matcher == 'metaphone'
+
+        with pytest.raises(CodecError):
+            dumps(Filter.attribute('sn').approx('smith', matcher=object()))
+
+    def test_many_strings(self):
+        filt = Filter.OR([Filter.attribute('uid{}'.format(i)).equal_to(str(i)) for i in range(70000)])
+        assert loads(dumps(filt)).to_string() == filt.to_string()
+
+    def test_deep_nesting(self):
+        filt = Filter('a', '=', '1')
+        for _ in range(5000):
+            filt = GroupNot([filt])
+
+        assert loads(dumps(filt)).to_program() == filt.to_program()
+
+    def test_decode_offset(self):
+        body = encode(Filter.parse(self.filters[1]))
+        filt, end = decode(b'xx' + body + b'yy', 2)
+        assert filt.to_string() == self.filters[1]
+        assert end == len(body) + 2
+
+    def test_invalid(self):
+        data = dumps(Filter.parse(self.filters[1]))
+
+        for bad in (b'', b'LDFT', b'XXXX' + data[4:], data[:4] + b'\x09\x00' + data[6:],
+                    data[:-1] + bytes([data[-1] ^ 1]), data[:-3], data + b'\x00'):
+            with pytest.raises(CodecError):
+                loads(bad)
+
+
+class TestFilterDiskCache:
+    filters = TestFilterCodec.filters
+
+    def teardown_method(self, method):
+        Filter.disable_parse_cache()
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / 'filters.cache'
+        cache = Filter.enable_disk_cache(path)
+
+        for string in self.filters:
+            Filter.parse(string)
+
+        assert cache.info().misses == len(self.filters)
+        cache.save()
+        cache.close()
+
+        cache = Filter.enable_disk_cache(path)
+        assert len(cache) == len(self.filters)
+        assert [Filter.parse(s).to_string() for s in self.filters] == [Filter.parse(s).to_string() for s in self.filters]
+        info = cache.info()
+        assert info.hits == 2 * len(self.filters)
+        assert info.misses == 0
+
+    def test_hits_are_copies(self, tmp_path):
+        cache = Filter.enable_disk_cache(tmp_path / 'filters.cache')
+        filt = '(&(|(sn=ron))(mail=*))'
+        Filter.parse(filt).simplify()
+        cache.save()
+        Filter.parse(filt).filters.append(Filter('x', '=', '1'))
+        assert Filter.parse(filt).to_string() == filt
+
+    def test_save_merges(self, tmp_path):
+        path = tmp_path / 'filters.cache'
+        cache = DiskCache(path)
+        cache.parse(self.filters[0], Filter.parse)
+        cache.save()
+        cache.parse(self.filters[1], Filter.parse)
+        cache.save()
+        cache.close()
+
+        assert self.filters[0] in DiskCache(path)
+        assert self.filters[1] in DiskCache(path)
+        assert [p.name for p in tmp_path.iterdir()] == ['filters.cache']
+
+    def test_save_during_get(self, tmp_path, monkeypatch):
+        import ldap_filter.diskcache as diskcache
+
+        cache = DiskCache(tmp_path / 'filters.cache')
+        cache.parse(self.filters[0], Filter.parse)
+        cache.save()
+        cache.parse(self.filters[1], Filter.parse)
+        decode = diskcache.codec.decode
+
+        # Another thread saving after get() released the lock.
+        def save_then_decode(body):
+            cache.save()
+            return decode(body)
+
+        monkeypatch.setattr(diskcache.codec, 'decode', save_then_decode)
+        assert cache.get(self.filters[0]).to_string() == Filter.parse(self.filters[0]).to_string()
+        assert not cache._pending
+
+    def test_damaged_record(self, tmp_path):
+        path = tmp_path / 'filters.cache'
+        cache = DiskCache(path)
+        cache.parse(self.filters[1], Filter.parse)
+        cache.save()
+        cache.close()
+
+        data = bytearray(path.read_bytes())
+        data[-2] ^= 0xff
+        path.write_bytes(bytes(data))
+
+        cache = DiskCache(path)
+        assert cache.get(self.filters[1]) is None
+        assert cache.parse(self.filters[1], Filter.parse).to_string() == self.filters[1]
+
+    def test_other_files_ignored(self, tmp_path):
+        for content in (b'', b'not a cache', b'LDFC\x63\x00'):
+            path = tmp_path / 'filters.cache'
+            path.write_bytes(content)
+            assert len(DiskCache(path)) == 0
+
+    def test_truncated_file(self, tmp_path):
+        path = tmp_path / 'filters.cache'
+        cache = DiskCache(path)
+
+        for string in self.filters:
+            cache.parse(string, Filter.parse)
+
+        cache.save()
+        cache.close()
+        path.write_bytes(path.read_bytes()[:-5])
+        assert len(DiskCache(path)) == len(self.filters) - 1
+
+    def test_clear(self, tmp_path):
+        path = tmp_path / 'filters.cache'
+        cache = DiskCache(path)
+        cache.parse(self.filters[0], Filter.parse)
+        cache.save()
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.info().misses == 0
+        cache.save()
+        assert len(DiskCache(path)) == 0
@@ -0,0 +1,69 @@
+import pytest
+from ldap_filter import Filter
+
+np = pytest.importorskip('numpy')
+
+
+class TestFilterColumnar:
+    table = {
+        'sn': np.array(['Smith', 'Jones', '', 'SMITH', 'Brown']),
+        'age': np.array([9, 10, 11, 12, 40]),
+        'score': np.array([1.5, float('nan'), 10.9, 11.0, 3.0]),
+        'mail': ['a@example.com', None, 'c@example.org', 'd@example.com', None],
+        'dept': [['sales', 'ops'], 'ops', None, ['hr'], 'Sales'],
+    }
+
+    def rows(self):
+        for i in range(5):
+            row = {}
+            for attr, column in self.table.items():
+                cell = column[i]
+                if cell is None or cell != cell:
+                    continue
+                row[attr] = cell.item() if hasattr(cell, 'item') else cell
+            yield row
+
+    def assert_matches(self, filt):
+        parsed = Filter.parse(filt)
+        expected = [bool(parsed.match(r)) for r in self.rows()]
+        mask = parsed.match_columns(self.table)
+        assert mask.dtype == bool
+        assert mask.tolist() == expected
+
+    def test_equality(self):
+        self.assert_matches('(sn=smith)')
+        self.assert_matches('(dept=sales)')
+
+    def test_present(self):
+        self.assert_matches('(mail=*)')
+        self.assert_matches('(score=*)')
+        self.assert_matches('(sn=*)')
+
+    def test_substring(self):
+        self.assert_matches('(mail=*@example.com)')
+
+    def test_ordering(self):
+        self.assert_matches('(age>=11)')
+        self.assert_matches('(age<=10)')
+        self.assert_matches('(score>=10)')
+        self.assert_matches('(sn<=jones)')
+
+    def test_approx(self):
+        self.assert_matches('(dept~=sails)')
+
+    def test_string_tests_on_numeric_columns(self):
+        ints = {'uid': np.array([10, 2, 15])}
+        floats = {'uid': np.array([10.0, 2.5, float('nan'), 15.0])}
+        assert Filter.parse('(uid=1*)').match_columns(ints).tolist() == [True, False, True]
+        assert Filter.parse('(uid=*5)').match_columns(floats).tolist() == [False, True, False, True]
+        assert Filter.parse('(uid=10*)').match_columns(floats).tolist() == [True, False, False, False]
+        assert Filter.parse('(uid~=10)').match_columns(ints).tolist() == [True, False, True]
+        assert Filter.parse('(uid~=2)').match_columns(floats).tolist() == [False, True, False, False]
+
+    def test_groups(self):
+        self.assert_matches('(&(age>=10)(|(sn=smith)(dept=ops))(!(mail=*@example.org)))')
+        self.assert_matches('(!(missing=*))')
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            Filter.parse('(sn=smith)').match_columns({'sn': ['a'], 'age': [1, 2]})
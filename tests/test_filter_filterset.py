@@ -0,0 +1,133 @@
+import random
+from ldap_filter import Filter
+from ldap_filter import FilterSet
+
+
+FILTERS = [
+    '(sn=smith)',
+    '(sn=SMITH)',
+    '(&(objectClass=person)(sn=smith))',
+    '(&(objectClass=person)(|(dept=sales)(dept=ops)))',
+    '(|(sn=*smi*)(mail=*@example.com))',
+    '(!(objectClass=person))',
+    '(&(age>=10)(!(age>=40)))',
+    '(name~=ashcroft)',
+    '(&(objectClass=person)(!(disabled=true))(|(dept=sales)(sn=smith)))',
+]
+
+
+def entries(count, seed=0):
+    rnd = random.Random(seed)
+
+    for i in range(count):
+        entry = {'uid': 'user{}'.format(i)}
+        if rnd.random() < 0.8:
+            entry['objectClass'] = rnd.choice(['person', ['top', 'Person'], 'group'])
+        if rnd.random() < 0.7:
+            entry['sn'] = rnd.choice(['Smith', 'smyth', 'Jones', 'Goldsmith'])
+        if rnd.random() < 0.5:
+            entry['dept'] = rnd.sample(['sales', 'ops', 'hr'], rnd.randint(1, 2))
+        if rnd.random() < 0.5:
+            entry['age'] = rnd.choice([9, 10, '12', '40', 'n/a'])
+        if rnd.random() < 0.3:
+            entry['name'] = rnd.choice(['Ashcroft', 'Ashcraft', 'Bob'])
+        if rnd.random() < 0.3:
+            entry['disabled'] = rnd.choice(['true', 'false', ''])
+        if rnd.random() < 0.5:
+            entry['mail'] = '{}@example.{}'.format(entry['uid'], rnd.choice(['com', 'org']))
+        yield entry
+
+
+class TestFilterSet:
+    def test_matches_filter_match(self):
+        filters = [Filter.parse(f) for f in FILTERS]
+        fset = FilterSet(filters)
+
+        for entry in entries(500):
+            expected = [i for i, f in enumerate(filters) if f.match(entry)]
+            assert fset.match(entry) == expected
+
+    def test_ids(self):
+        fset = FilterSet({'a': '(sn=smith)', 'b': Filter.parse('(sn=jones)')})
+        assert fset.add('(sn=*)') == 0
+        assert fset.add('(uid=x)', 'c') == 'c'
+        assert len(fset) == 4
+        assert fset.match({'sn': 'Smith'}) == ['a', 0]
+
+        fset.remove('a')
+        assert 'a' not in fset
+        assert fset.match({'sn': 'Smith'}) == [0]
+
+    def test_remove_releases_nodes(self):
+        fset = FilterSet()
+        for i in range(1000):
+            fset.add('(&(objectClass=person)(uid=user{}))'.format(i))
+        shared = fset.add('(objectClass=person)')
+
+        for i in range(1000):
+            fset.remove(i)
+
+        assert fset.match({'objectClass': 'person', 'uid': 'user5'}) == [shared]
+        assert len(fset._slots) == 1
+        assert dict(fset._equal) == {'objectClass': {'person': [fset._roots[shared]]}}
+
+        fset.remove(shared)
+        assert not fset._slots and not fset._equal
+        assert fset.match({'objectClass': 'person'}) == []
+
+        # Released slots are reused.
+        fset.add('(&(a=1)(b=2))')
+        assert len(fset._nodes) == 2001
+
+    def test_replace_id(self):
+        fset = FilterSet({'a': '(sn=smith)'})
+        fset.add('(sn=jones)', 'a')
+        assert fset.match({'sn': 'smith'}) == []
+        assert fset.match({'sn': 'jones'}) == ['a']
+        assert list(fset._equal['sn']) == ['jones']
+
+    def test_shared_nodes(self):
+        fset = FilterSet([
+            '(&(objectClass=person)(sn=smith))',
+            '(&(objectClass=person)(sn=smith))',
+            '(|(objectClass=person)(&(objectClass=person)(sn=smith)))',
+        ])
+        assert len(fset._nodes) == 4
+
+    def test_leaf_evaluated_once(self):
+        calls = []
+
+        class Entry(dict):
+            def __getitem__(self, key):
+                calls.append(key)
+                return super().__getitem__(key)
+
+        fset = FilterSet(['(sn=*smi*)', '(&(uid=*)(sn=*smi*))', '(|(sn=*smi*)(uid=x))'])
+        assert fset.match(Entry(sn='Smith', uid='x')) == [0, 1, 2]
+        assert calls.count('sn') == 1
+
+    def test_global_approx_matcher(self):
+        fset = FilterSet(['(sn~=Smith)', '(|(sn~=Smith)(uid=x))'])
+        fset.add(Filter.attribute('sn').approx('Smith', 'soundex'), 'fixed')
+        assert fset.match({'sn': 'Smoothy'}) == [0, 1, 'fixed']
+
+        try:
+            Filter.approx_matcher = 'edit_distance'
+            assert fset.match({'sn': 'Smoothy'}) == ['fixed']
+            assert fset.match({'sn': 'Smitt'}) == [0, 1, 'fixed']
+        finally:
+            Filter.approx_matcher = 'soundex'
+
+        assert fset.match({'sn': 'Smoothy'}) == [0, 1, 'fixed']
+
+    def test_equal_values(self):
+        fset = FilterSet(['(sn=smith)', '(sn=SMITH)', '(sn=jones)', '(cn=x)'])
+        assert fset.match({'sn': ['JONES', 'Smith']}) == [0, 1, 2]
+        assert fset.match({'sn': ['', 'smith'], 'cn': 'X'}) == [0, 1, 3]
+        assert fset.match({'sn': ''}) == []
+
+    def test_errors(self):
+        assert FilterSet(['(!(sn=smith))']).match({'sn': 5}) == [0]
+        assert FilterSet(['(!(sn=smith))', '(sn=smith)']).match({'sn': [5]}) == [0]
+        assert FilterSet(['(sn=smith)', '(age=10)']).match({'sn': 'smith', 'age': 10}) == [0]
+        assert FilterSet(['(age=10)', '(&(age=10)(sn=x))', '(sn=smith)']).match({'sn': 'smith', 'age': 10}) == [2]
@@ -0,0 +1,76 @@
+import random
+import pytest
+from ldap_filter import Filter
+from ldap_filter import EntryIndex
+
+
+def entries(count, seed=0):
+    rnd = random.Random(seed)
+    names = ['Smith', 'smyth', 'Jones', 'Brown', 'Goldsmith', 'Ashcroft']
+    depts = ['sales', 'ops', 'hr', 'eng']
+
+    for i in range(count):
+        entry = {'uid': 'user{}'.format(i), 'age': rnd.choice([9, 10, 11, '12', '40', 'n/a'])}
+        if rnd.random() < 0.8:
+            entry['sn'] = rnd.choice(names)
+        if rnd.random() < 0.7:
+            entry['dept'] = rnd.sample(depts, rnd.randint(1, 2))
+        if rnd.random() < 0.5:
+            entry['mail'] = '{}@example.{}'.format(entry['uid'], rnd.choice(['com', 'org']))
+        yield entry
+
+
+FILTERS = [
+    '(sn=smith)',
+    '(sn=*)',
+    '(sn=*smi*)',
+    '(mail=*@example.com)',
+    '(age>=10)',
+    '(age<=11)',
+    '(age>=abc)',
+    '(sn~=smith)',
+    '(dept=ops)',
+    '(!(dept=ops))',
+    '(&(sn=*)(!(sn=smith))(|(dept=hr)(dept=eng)))',
+    '(|(uid=user1)(uid=user7)(uid=missing))',
+    '(&(!(mail=*))(!(age>=11)))',
+    '(missing=x)',
+]
+
+
+class TestEntryIndex:
+    @pytest.mark.parametrize('ngram', [None, 3])
+    def test_matches_scan(self, ngram):
+        data = list(entries(300))
+        index = EntryIndex(data, ngram=ngram)
+        assert len(index) == 300
+
+        for filt in FILTERS:
+            parsed = Filter.parse(filt)
+            expected = set(i for i, e in enumerate(data) if parsed.match(e))
+            assert index.search_ids(parsed) == expected, filt
+
+    def test_search_returns_entries(self):
+        index = EntryIndex()
+        index.add({'cn': 'alice', 'age': '30'})
+        index.add({'cn': 'bob', 'age': '25'})
+        assert index.search(Filter.parse('(age>=26)')) == [{'cn': 'alice', 'age': '30'}]
+
+    def test_sorted_index_updates(self):
+        index = EntryIndex([{'age': 5}])
+        assert index.search_ids(Filter.parse('(age>=1)')) == {0}
+        index.add({'age': 7})
+        assert index.search_ids(Filter.parse('(age>=6)')) == {1}
+
+    def test_binary_values_never_in_range(self):
+        data = [{'b': b'ab'}, {'b': [b'12', 'abd']}, {'b': b'12'}]
+        index = EntryIndex(data)
+
+        for string in ('(b>=abc)', '(b<=abc)', '(b>=10)', '(b<=20)'):
+            filt = Filter.parse(string)
+            compiled = filt.compile()
+            expected = set(i for i, e in enumerate(data) if filt.match(e))
+            assert expected == set(i for i, e in enumerate(data) if compiled(e))
+            assert index.search_ids(filt) == expected, string
+
+        assert index.search_ids(Filter.parse('(b>=abc)')) == {1}
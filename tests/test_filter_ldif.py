@@ -0,0 +1,97 @@
+import base64
+import io
+import pytest
+from ldap_filter import Filter
+from ldap_filter.ldif import LDIFError, filter_ldif, read_ldif
+
+
+LDIF = '''version: 1
+
+# An entry with a folded
+ comment
+dn: uid=jdoe,ou=people,dc=example,dc=com
+objectClass: top
+objectClass: person
+uid: jdoe
+cn: John
+  Doe
+description:: {description}
+sn:   Doe
+
+dn: uid=asmith,ou=people,dc=example,dc=com
+objectClass: person
+uid: asmith
+cn: Alice Smith
+mail: alice@example.com
+jpegPhoto:: /9j/4A==
+'''.format(description=base64.b64encode('Grüße'.encode('utf-8')).decode('ascii'))
+
+
+class TestLDIF:
+    def test_read_path(self, tmp_path):
+        path = tmp_path / 'people.ldif'
+        path.write_text(LDIF.replace('\n', '\r\n'), encoding='utf-8')
+        entries = list(read_ldif(path))
+
+        assert len(entries) == 2
+        assert entries[0] == {
+            'dn': 'uid=jdoe,ou=people,dc=example,dc=com',
+            'objectClass': ['top', 'person'],
+            'uid': 'jdoe',
+            'cn': 'John Doe',
+            'description': 'Grüße',
+            'sn': 'Doe',
+        }
+        assert entries[1]['mail'] == 'alice@example.com'
+        assert entries[1]['jpegPhoto'] == b'\xff\xd8\xff\xe0'
+
+    def test_read_file_objects(self):
+        assert list(read_ldif(io.StringIO(LDIF))) == list(read_ldif(io.BytesIO(LDIF.encode('utf-8'))))
+        assert list(read_ldif(io.StringIO(''))) == []
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / 'empty.ldif'
+        path.write_bytes(b'')
+        assert list(read_ldif(str(path))) == []
+
+    def test_folded_utf8(self):
+        value = 'Zoë'.encode('utf-8')
+        data = b'dn: cn=x\ncn: Zo' + value[2:3] + b'\n ' + value[3:] + b'\n'
+        assert list(read_ldif(io.BytesIO(data))) == [{'dn': 'cn=x', 'cn': 'Zoë'}]
+
+    def test_lazy(self):
+        def lines():
+            yield 'dn: cn=a\n'
+            yield '\n'
+            raise AssertionError('read past the first entry')
+
+        assert next(read_ldif(lines())) == {'dn': 'cn=a'}
+
+    def test_errors(self):
+        with pytest.raises(LDIFError):
+            list(read_ldif(io.StringIO('dn: cn=a\nnot a line\n')))
+        with pytest.raises(LDIFError):
+            list(read_ldif(io.StringIO(' continued\n')))
+        with pytest.raises(LDIFError):
+            list(read_ldif(io.StringIO('dn: cn=a\nphoto:: ***\n')))
+
+    def test_filter_ldif(self, tmp_path):
+        path = tmp_path / 'people.ldif'
+        path.write_text(LDIF, encoding='utf-8')
+
+        assert [e['uid'] for e in filter_ldif(path, '(objectClass=person)')] == ['jdoe', 'asmith']
+        assert [e['uid'] for e in filter_ldif(path, Filter.parse('(cn=*smith)'))] == ['asmith']
+        assert list(filter_ldif(path, '(mail=bob*)')) == []
+
+    def test_binary_values(self):
+        lines = io.StringIO(LDIF)
+
+        for filt in ('(jpegPhoto=*a*)', '(jpegPhoto=a*)', '(jpegPhoto=*a*b*)', '(jpegPhoto~=photo)', '(jpegPhoto=photo)'):
+            assert list(filter_ldif(io.StringIO(LDIF), filt)) == []
+
+        assert [e['uid'] for e in filter_ldif(lines, '(&(jpegPhoto=*)(!(jpegPhoto=*a*)))')] == ['asmith']
+
+        # Text values next to binary ones are still tested.
+        entry = {'jpegPhoto': [b'\xff\xd8', 'a photo']}
+        assert Filter.parse('(jpegPhoto=*photo)').match(entry)
+        assert Filter.parse('(jpegPhoto=*photo)').compile()(entry)
@@ -1,5 +1,8 @@
 import pytest
 from ldap_filter import Filter
+from ldap_filter.filter import GroupNot
+from ldap_filter.soundex import soundex, soundex_compare
+from ldap_filter.cost import MatchStatistics
 
 
 class TestFilterMatch:
@@ -133,3 +136,220 @@ class TestFilterMatch:
     def test_match_escaped_substrings(self):
         filt = Filter.attribute('sub').raw('*jerry\\5c \\2a j*s*')
         assert filt.match({'sub': 'Jerry\\ * Jones'})
+
+
+class TestFilterCompile:
+    def test_compiled_matches_interpreted(self):
+        filters = [
+            '(sn=smith)',
+            '(sn=*)',
+            '(sn=*smi*th*)',
+            '(age>=10)',
+            '(age<=10)',
+            '(name>=bob)',
+            '(name~=ashcroft)',
+            '(&(|(sn=ron)(sn=bob))(mail=*)(!(account=disabled)))',
+        ]
+        entries = [
+            {},
+            {'sn': 'Smith', 'age': 9, 'name': 'Ashcraft'},
+            {'sn': ['Sam', 'SMITH'], 'age': '11', 'name': 'cell'},
+            {'sn': 'ron', 'mail': 'ron@example.com', 'account': 'active'},
+            {'sn': 'bob', 'mail': 'bob@example.com', 'account': 'Disabled'},
+            {'sn': '', 'age': 'ten', 'name': ['acme', 'bob']},
+        ]
+        for filt in filters:
+            parsed = Filter.parse(filt)
+            compiled = parsed.compile()
+            for entry in entries:
+                assert compiled(entry) == bool(parsed.match(entry))
+
+    def test_compiled_escaped(self):
+        filt = Filter.attribute('sub').raw('*jerry\\5c \\2a j*s*').compile()
+        assert filt({'sub': 'Jerry\\ * Jones'})
+        filt = Filter.attribute('escaped').equal_to('*(test)*').compile()
+        assert filt({'escaped': '*(test)*'})
+        assert not filt({'escaped': '(test)'})
+
+    def test_compiled_not(self):
+        filt = Filter.NOT([Filter.attribute('firstName').equal_to('Alice')]).compile()
+        assert filt({'firstName': 'Bob'})
+        assert filt({})
+        assert not filt({'firstName': 'Alice'})
+
+    def test_compiled_equality_sets(self):
+        filters = [
+            '(|(uid=a)(uid=B)(uid=c\\28)(mail=*))',
+            '(&(uid=a)(uid=b)(sn=smith))',
+            '(|(uid=a)(sn=x)(uid=b))',
+            '(!(|(uid=a)(uid=b)))',
+        ]
+        entries = [
+            {},
+            {'uid': 'A'},
+            {'uid': ['x', 'b'], 'sn': 'Smith'},
+            {'uid': ['a', 'B'], 'sn': 'smith'},
+            {'uid': 'C(', 'mail': ''},
+            {'uid': ['', 'a']},
+            {'uid': 0, 'sn': 'x'},
+        ]
+        for filt in filters:
+            parsed = Filter.parse(filt)
+            compiled = parsed.compile()
+            for entry in entries:
+                assert compiled(entry) == bool(parsed.match(entry))
+
+    def test_compiled_equality_set_errors(self):
+        filt = Filter.parse('(|(uid=a)(uid=b))')
+        with pytest.raises(AttributeError):
+            filt.compile()({'uid': [5, 'b']})
+
+        filt = GroupNot([Filter.parse('(uid=a)'), Filter.parse('(uid=b)')])
+        assert filt.compile()({'uid': ['b', 5]}) is False
+        assert filt.compile()({'uid': ['c', 5]}) is True
+        assert filt.compile()({'uid': ['a']}) is False
+
+    def test_compiled_ordering_conversions(self):
+        for string in ('(a>=x)', '(a<=x)', '(a>=5)'):
+            filt = Filter.parse(string)
+            compiled = filt.compile()
+
+            for value in ('abc', '7', 7, 'x', ['y', '3']):
+                assert compiled({'a': value}) == filt.match({'a': value})
+
+            for value in (None, [None]):
+                with pytest.raises(TypeError):
+                    filt.match({'a': value})
+                with pytest.raises(TypeError):
+                    compiled({'a': value})
+
+    def test_compiled_large_or(self):
+        filt = Filter.OR([Filter.attribute('uid').equal_to('user{}'.format(i)) for i in range(5000)])
+        compiled = filt.compile()
+        assert compiled({'uid': 'USER4999'})
+        assert compiled({'uid': ['x', 'user0']})
+        assert not compiled({'uid': 'user5000'})
+        assert not compiled({'cn': 'user1'})
+
+
+class TestFilterBatch:
+    def test_filter_records(self):
+        filt = Filter.parse('(&(department=accounting)(!(status=terminated)))')
+        records = [
+            {'name': 'Bob', 'department': 'Accounting', 'status': 'Active'},
+            {'name': 'Jane', 'department': 'Accounting', 'status': 'Terminated'},
+            {'name': 'Sam', 'department': 'Marketing', 'status': 'Active'},
+            {'name': 'Alice', 'department': 'accounting'},
+        ]
+        matches = filt.filter_records(iter(records))
+        assert [r['name'] for r in matches] == ['Bob', 'Alice']
+
+    def test_match_many(self):
+        filt = Filter.attribute('sn').ends_with('smith')
+        records = [{'sn': 'Smith'}, {'sn': 'Jones'}, {}, {'sn': ['a', 'Goldsmith']}]
+        assert list(filt.match_many(records)) == [True, False, False, True]
+
+    def test_lazy(self):
+        filt = Filter.attribute('sn').present()
+
+        def records():
+            yield {'sn': 'a'}
+            raise AssertionError('consumed too far')
+
+        assert next(filt.filter_records(records())) == {'sn': 'a'}
+
+
+class TestFilterReorder:
+    def test_reorder_by_cost(self):
+        filt = Filter.parse('(&(name~=ashcroft)(sn=*smith*)(age>=10)(sn=smith)(mail=*))')
+        string = filt.reorder().to_string()
+        assert string == '(&(sn=smith)(age>=10)(sn=*smith*)(mail=*)(name~=ashcroft))'
+
+    def test_reorder_or(self):
+        filt = Filter.parse('(|(sn=*smith*)(&(a=1)(b=2))(mail=*))')
+        string = filt.reorder().to_string()
+        assert string == '(|(mail=*)(sn=*smith*)(&(a=1)(b=2)))'
+
+    def test_reorder_with_statistics(self):
+        stats = MatchStatistics()
+        filt = Filter.parse('(&(dept=sales)(status=active))')
+        compiled = filt.compile(stats=stats)
+        for i in range(100):
+            compiled({'dept': 'sales', 'status': 'active' if i % 10 == 0 else 'inactive'})
+        assert stats.counts['(dept=sales)'] == [100, 100]
+        assert stats.counts['(status=active)'] == [100, 10]
+        string = filt.reorder(stats).to_string()
+        assert string == '(&(status=active)(dept=sales))'
+
+    def test_compile_reorder_keeps_tree(self):
+        filt = Filter.parse('(&(sn=*smith*)(!(mail=*))(uid=bob))')
+        compiled = filt.compile(reorder=True)
+        assert filt.to_string() == '(&(sn=*smith*)(!(mail=*))(uid=bob))'
+        for entry in [{'sn': 'Smith', 'uid': 'bob'}, {'sn': 'Smith', 'uid': 'bob', 'mail': 'x'}, {}]:
+            assert compiled(entry) == filt.match(entry)
+
+
+class TestSoundex:
+    def test_codes(self):
+        assert soundex('Robert') == 'R163'
+        assert soundex('Rupert') == 'R163'
+        assert soundex('Tymczak') == 'T520'
+        assert soundex('Pfister') == 'P1236'
+        assert soundex('Ashcroft') == 'A2613'
+        assert soundex('Washington') == 'W5235'
+        assert soundex('A') == 'A000'
+        assert soundex('12-lane') == '1450'
+        assert soundex('bob', scale=6) == 'B10000'
+
+    def test_errors(self):
+        with pytest.raises(IndexError):
+            soundex('')
+        with pytest.raises(AttributeError):
+            soundex(5)
+        with pytest.raises(AttributeError):
+            soundex(['bob'])
+
+    def test_compare(self):
+        assert soundex_compare('Ashcroft', 'ashcraft')
+        assert not soundex_compare('Ashcroft', 'Ashford')
+
+
+class TestFilterSubstring:
+    def test_shapes(self):
+        entry = {'mail': 'John.Smith@Example.com'}
+        assert Filter.parse('(mail=john*)').match(entry)
+        assert Filter.parse('(mail=*@example.com)').match(entry)
+        assert Filter.parse('(mail=*smith*)').match(entry)
+        assert Filter.parse('(mail=j*.*@*.com)').match(entry)
+        assert not Filter.parse('(mail=*@example.org)').match(entry)
+        assert not Filter.parse('(mail=john*smith*john*)').match(entry)
+        assert not Filter.parse('(mail=ab*ba)').match({'mail': 'aba'})
+
+    def test_literal(self):
+        assert Filter.parse('(cn=*a.b*)').match({'cn': 'xa.by'})
+        assert not Filter.parse('(cn=*a.b*)').match({'cn': 'xaxby'})
+        assert Filter.parse('(cn=a+b*)').match({'cn': 'A+B'})
+        assert Filter.parse('(cn=*[x]*)').match({'cn': '[x]'})
+        assert Filter.parse('(cn=a*)').match({'cn': 'a\nb'})
+
+    def test_cached_on_node(self):
+        filt = Filter.parse('(mail=*@example.com)')
+        assert filt.match({'mail': 'a@example.com'})
+        test = filt._substring_test()
+        assert filt._substring_test() is test
+
+        filt.val = '*@example.org'
+        assert not filt.match({'mail': 'a@example.com'})
+        assert filt.match({'mail': 'a@example.org'})
+
+    def test_compiled(self):
+        compiled = Filter.parse('(|(mail=*@example.com)(cn=a.*))').compile()
+        assert compiled({'mail': ['x', 'B@EXAMPLE.COM']})
+        assert compiled({'cn': 'A.B'})
+        assert not compiled({'cn': 'ab'})
+
+    def test_not_a_string(self):
+        with pytest.raises(TypeError):
+            Filter.parse('(cn=a*)').match({'cn': 5})
+        with pytest.raises(TypeError):
+            Filter.parse('(cn=a*)').compile()({'cn': [None]})
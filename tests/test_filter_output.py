@@ -58,3 +58,90 @@ class TestFilterSimplify:
         parsed = Filter.parse(filt)
         string = parsed.simplify().to_string()
         assert string == optimized
+
+
+class TestFilterOptimize:
+    def assert_optimized(self, filt, optimized):
+        parsed = Filter.parse(filt)
+        assert parsed.optimize().to_string() == optimized
+        assert parsed.to_string() == filt
+        assert Filter.parse(optimized).optimize().to_string() == optimized
+
+    def test_flatten(self):
+        self.assert_optimized('(&(&(a=1)(b=2))(c=3))', '(&(a=1)(b=2)(c=3))')
+        self.assert_optimized('(|(a=1)(|(b=2)(|(c=3))))', '(|(a=1)(b=2)(c=3))')
+
+    def test_duplicates(self):
+        self.assert_optimized('(&(a=1)(b=2)(a=1))', '(&(a=1)(b=2))')
+        self.assert_optimized('(|(a=1)(a=1))', '(a=1)')
+
+    def test_double_negation(self):
+        self.assert_optimized('(!(!(a=1)))', '(a=1)')
+
+    def test_contradiction(self):
+        self.assert_optimized('(&(x=1)(!(x=1)))', '(|)')
+        self.assert_optimized('(&(a=1)(b=2)(!(b=2)))', '(|)')
+        self.assert_optimized('(!(&(x=1)(!(x=1))))', '(&)')
+
+    def test_tautology(self):
+        self.assert_optimized('(|(x=1)(!(x=1)))', '(&)')
+        self.assert_optimized('(&(a=1)(|(x=1)(!(x=1))))', '(a=1)')
+
+    def test_absorption(self):
+        self.assert_optimized('(&(a=1)(|(a=1)(b=2)))', '(a=1)')
+        self.assert_optimized('(|(a=1)(&(a=1)(b=2)))', '(a=1)')
+
+    def test_range_bounds(self):
+        self.assert_optimized('(&(x>=5)(x>=3)(x<=8))', '(&(x>=5)(x<=8))')
+        self.assert_optimized('(|(x<=5)(x<=3))', '(x<=5)')
+        self.assert_optimized('(&(sn>=b)(sn>=a))', '(sn>=b)')
+
+    def test_range_bounds_with_different_orders(self):
+        self.assert_optimized('(&(x>=10)(x>=9))', '(&(x>=10)(x>=9))')
+        self.assert_optimized('(&(x>=5)(x<=3))', '(&(x>=5)(x<=3))')
+
+
+class TestFilterFreeze:
+    def test_structural_equality(self):
+        a = Filter.parse('(&(a=1)(|(b=2)(!(c=3))))').freeze()
+        b = Filter.parse('(&(a=1)(|(b=2)(!(c=3))))').freeze()
+        assert a == b
+        assert hash(a) == hash(b)
+        assert a != Filter.parse('(&(a=1)(|(b=2)(!(c=4))))').freeze()
+        assert a.to_string() == '(&(a=1)(|(b=2)(!(c=3))))'
+
+    def test_interned(self):
+        a = Filter.parse('(&(a=1)(b=2))').freeze()
+        b = Filter.parse('(|(x=1)(&(a=1)(b=2)))').freeze()
+        assert b.filters[1] is a
+        assert a.filters[0] is Filter.attribute('a').equal_to('1').freeze()
+        assert len({a, b.filters[1], a.freeze()}) == 1
+
+    def test_immutable(self):
+        filt = Filter.parse('(&(a=1)(b=2))').freeze()
+        with pytest.raises(AttributeError):
+            filt.filters = []
+        with pytest.raises(AttributeError):
+            filt.filters[0].val = '2'
+        with pytest.raises(AttributeError):
+            del filt.comp
+
+    def test_rewrites_return_frozen(self):
+        filt = Filter.parse('(&(&(a=1))(a=1)(b=2))').freeze()
+        assert filt.simplify() is Filter.parse('(&(a=1)(a=1)(b=2))').freeze()
+        assert filt.optimize() is Filter.parse('(&(a=1)(b=2))').freeze()
+        assert filt.to_string() == '(&(&(a=1))(a=1)(b=2))'
+
+    def test_copy_and_pickle(self):
+        import copy
+        import pickle
+
+        filt = Filter.parse('(&(a=1)(!(b=*x*)))').freeze()
+        assert copy.deepcopy(filt) is filt
+        assert pickle.loads(pickle.dumps(filt)) is filt
+
+    def test_match(self):
+        filt = Filter.parse('(&(a=1)(!(b=2)))').freeze()
+        assert filt.match({'a': '1', 'b': '3'})
+        assert not filt.match({'a': '1', 'b': '2'})
+        assert filt.compile()({'a': '1'})
@@ -0,0 +1,75 @@
+import multiprocessing
+import pickle
+import subprocess
+import sys
+import pytest
+import ldap_filter.approx as approx
+from ldap_filter import Filter
+
+
+class FirstLetter(approx.ApproxMatcher):
+    def key(self, value):
+        return value[:1].lower()
+
+
+class TestFilterParallel:
+    filt = '(&(|(sn=ron)(sn=bob))(mail=*@example.com)(!(account=disabled)))'
+
+    def records(self, count):
+        for i in range(count):
+            yield {
+                'sn': ['ron', 'bob', 'sam'][i % 3],
+                'mail': 'user{}@example.com'.format(i),
+                'account': 'disabled' if i % 5 == 0 else 'active',
+            }
+
+    def test_pickle_round_trip(self):
+        parsed = Filter.parse(self.filt)
+        restored = pickle.loads(pickle.dumps(parsed))
+        assert restored.to_string() == self.filt
+        assert restored.match(list(self.records(2))[1])
+
+    def test_pickle_after_match(self):
+        parsed = Filter.parse(self.filt)
+        parsed.match(list(self.records(2))[1])
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(parsed, protocol))
+            assert restored.to_string() == self.filt
+            assert restored.match(list(self.records(2))[1])
+
+    def test_ordered(self):
+        parsed = Filter.parse(self.filt)
+        expected = [parsed.match(r) for r in self.records(250)]
+        results = parsed.match_parallel(self.records(250), workers=2, chunksize=16)
+        assert list(results) == expected
+
+    def test_unordered(self):
+        parsed = Filter.parse(self.filt)
+        expected = [parsed.match(r) for r in self.records(250)]
+        results = parsed.match_parallel(self.records(250), workers=2, chunksize=16, ordered=False)
+        assert sorted(results) == list(enumerate(expected))
+
+    def test_import_does_not_load_multiprocessing(self):
+        code = 'import sys, ldap_filter; print("multiprocessing" in sys.modules)'
+        output = subprocess.check_output([sys.executable, '-c', code])
+        assert output.strip() == b'False'
+
+    def test_invalid_chunksize(self):
+        with pytest.raises(ValueError):
+            list(Filter.parse(self.filt).match_parallel([], chunksize=0))
+
+    def test_approx_matchers_with_spawn(self):
+        records = [{'cn': 'Night'}, {'cn': 'Nite'}, {'cn': 'Day'}]
+        context = multiprocessing.get_context('spawn')
+        approx.register('first_letter', FirstLetter())
+        Filter.approx_matcher = 'metaphone'
+
+        try:
+            for filt in [Filter.parse('(cn~=knight)'), Filter.attribute('cn').approx('nought', 'first_letter')]:
+                expected = list(filt.match_many(records))
+                results = filt.match_parallel(records, workers=1, mp_context=context)
+                assert list(results) == expected
+        finally:
+            Filter.approx_matcher = 'soundex'
+            del approx.MATCHERS['first_letter']
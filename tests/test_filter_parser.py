@@ -54,7 +54,8 @@ class TestFilterParser:
         filt = '(o=Parens R Us \\28for all your parenthetical needs\\29)'
         parsed = Filter.parse(filt)
         string = parsed.to_string()
-        assert string == '(o=Parens R Us (for all your parenthetical needs))'
+        assert string == '(o=Parens R Us \\28for all your parenthetical needs\\29)'
+        assert Filter.parse(string).to_string() == string
 
     def test_substring_match(self):
         filt = '(sn=*sammy*)'
@@ -94,3 +95,134 @@ class TestFilterParser:
             filt = '(&(orgUnit=accounting))\n(mail=ron@example.com) f'
             Filter.parse(filt)
 
+    def test_malformed_error_message(self):
+        with pytest.raises(ParseError) as e:
+            Filter.parse('(|(name=bob)name=bill))')
+        assert str(e.value) == (
+            'Line 1: expected [\\x20], [\\x09], "\\r\\n", "\\n", \'(\', \')\'\n'
+            '(|(name=bob)name=bill))\n'
+            '            ^'
+        )
+
+    def test_allows_tabs_in_groups(self):
+        filt = '(&\t(sn=ron)\t(mail=*))'
+        parsed = Filter.parse(filt)
+        string = parsed.to_string()
+        assert string == '(&(sn=ron)(mail=*))'
+
+    def test_escaped_null(self):
+        parsed = Filter.parse('(sn=a\\00b)')
+        assert getattr(parsed, 'val') == 'a\\00b'
+        assert parsed.match({'sn': 'a\x00b'})
+
+    def test_compact_nodes(self):
+        first = Filter.parse('(&(department=sales)(!(status=x)))')
+        second = Filter.parse('(|(department=hr)(status>=y))')
+        assert not hasattr(first, '__dict__')
+        assert not hasattr(first.filters[0], '__dict__')
+        assert first.type == 'group' and first.filters[0].type == 'filter'
+        assert first.filters[0].attr is second.filters[0].attr
+
+    def test_whitespace_in_values_preserved(self):
+        filt = '(&\n  (cn=ab)\n  (sn= a b  )\n  (description=line one\nline two)\n  (c n>=ab x)\n)'
+        parsed = Filter.parse(filt)
+        assert parsed.to_string() == '(&(cn=ab)(sn= a b  )(description=line one\nline two)(cn>=ab x))'
+
+    def test_indented_round_trip(self):
+        filt = '(&(cn=John Smith)(|(ou=Sales Team)(ou=R D))(!(title=Vice President)))'
+        assert Filter.parse(Filter.parse(filt).to_string(indent=4)).to_string() == filt
+
+    def test_large_or_filter(self):
+        filt = '(|' + ''.join('(uid=user{})'.format(i) for i in range(5000)) + ')'
+        parsed = Filter.parse(filt)
+        assert len(parsed.filters) == 5000
+        assert parsed.to_string() == filt
+
+    def test_empty_groups(self):
+        for filt, result in (('(&)', True), ('(|)', False), ('(!(|))', True), ('(&(a=1)(|))', False)):
+            parsed = Filter.parse(filt)
+            assert parsed.to_string() == filt
+            assert parsed.match({'a': '1'}) is result
+        assert Filter.parse('( & )').filters == []
+
+        with pytest.raises(ParseError):
+            Filter.parse('(!)')
+
+    def test_extensible_match(self):
+        parsed = Filter.parse('(cn:dn:caseExactMatch:=Fred)')
+        assert (parsed.attr, parsed.comp, parsed.val) == ('cn:dn:caseExactMatch', ':=', 'Fred')
+        assert parsed.to_string() == '(cn:dn:caseExactMatch:=Fred)'
+        assert not parsed.match({'cn': 'Fred'})
+
+    def test_bytes_input(self):
+        filt = '(&(cn=caf\\c3\\a9)(sn=José)\n  (!(mail=*)))'
+        expected = Filter.parse(filt).to_string()
+        data = filt.encode('utf-8')
+        for inpt in (data, bytearray(data), memoryview(b'..' + data)[2:]):
+            assert Filter.parse(inpt).to_string() == expected
+
+    def test_bytes_invalid_utf8(self):
+        with pytest.raises(ParseError) as e:
+            Filter.parse(b'(&(cn=a)(sn=\xff))')
+        assert str(e.value).startswith('Line 1: expected UTF-8')
+        assert str(e.value).endswith('\n' + ' ' * 12 + '^')
+
+
+class TestParseCache:
+    def teardown_method(self):
+        Filter.disable_parse_cache()
+
+    def test_cache_hits(self):
+        cache = Filter.enable_parse_cache(maxsize=8)
+        filt = '(&(|(sn=ron)(sn=bob))(mail=*))'
+        first = Filter.parse(filt)
+        second = Filter.parse(filt)
+        assert first.to_string() == second.to_string() == filt
+        assert first is not second
+        info = cache.info()
+        assert info.hits == 1
+        assert info.misses == 1
+        assert info.currsize == 1
+
+    def test_cached_tree_is_copied(self):
+        Filter.enable_parse_cache()
+        filt = '(&(|(sn=ron))(mail=*))'
+        Filter.parse(filt).simplify()
+        assert Filter.parse(filt).to_string() == filt
+
+    def test_cached_nodes_are_copied(self):
+        Filter.enable_parse_cache()
+        filt = '(&(|(sn=ron)(sn=bob))(!(mail=*)))'
+        first = Filter.parse(filt)
+        second = Filter.parse(filt)
+        for a, b in ((first, second), (first.filters[0], second.filters[0]),
+                     (first.filters[0].filters[1], second.filters[0].filters[1])):
+            assert a is not b and type(a) is type(b)
+        assert first.filters is not second.filters
+        second.filters[0].filters[1].val = 'sam'
+        assert Filter.parse(filt).to_string() == filt
+
+    def test_cache_eviction(self):
+        cache = Filter.enable_parse_cache(maxsize=2)
+        Filter.parse('(a=1)')
+        Filter.parse('(b=2)')
+        Filter.parse('(a=1)')
+        Filter.parse('(c=3)')
+        assert '(a=1)' in cache
+        assert '(b=2)' not in cache
+        assert cache.info().evictions == 1
+
+    def test_cache_bytes_keys(self):
+        cache = Filter.enable_parse_cache()
+        Filter.parse('(a=1)')
+        Filter.parse(b'(a=1)')
+        Filter.parse(memoryview(b'(a=1)'))
+        assert len(cache) == 1
+        assert cache.info().hits == 2
+
+    def test_cache_errors_not_cached(self):
+        cache = Filter.enable_parse_cache()
+        for _ in range(2):
+            with pytest.raises(ParseError):
+                Filter.parse('(sn=sammy')
+        assert len(cache) == 0
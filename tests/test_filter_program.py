@@ -0,0 +1,96 @@
+import pickle
+import pytest
+from ldap_filter import Filter, Program
+from ldap_filter.filter import GroupAnd, GroupNot, GroupOr
+
+
+class TestFilterProgram:
+    entries = [
+        {'sn': 'Smith', 'mail': 'smith@example.com', 'age': '42'},
+        {'sn': ['Jones', 'Smith'], 'age': '17'},
+        {'sn': 'Brown', 'mail': ['b@example.org', 'brown@example.com']},
+        {'cn': 'nobody'},
+        {'sn': 'smith', 'age': '20'},
+    ]
+
+    filters = [
+        '(sn=smith)',
+        '(mail=*)',
+        '(mail=*@example.com)',
+        '(age>=18)',
+        '(sn~=smyth)',
+        '(&(sn=smith)(age>=18))',
+        '(|(sn=brown)(sn=jones)(mail=*.org))',
+        '(!(sn=smith))',
+        '(&(|(sn=smith)(sn=brown))(!(age<=20))(mail=*example*))',
+        '(!(&(sn=smith)(!(|(age=42)(age=17)))))',
+    ]
+
+    def test_same_as_match(self):
+        for string in self.filters:
+            filt = Filter.parse(string)
+            program = filt.to_program()
+
+            for entry in self.entries:
+                assert program.match(entry) == bool(filt.match(entry)), (string, entry)
+
+    def test_global_approx_matcher(self):
+        program = Filter.parse('(sn~=Smith)').to_program()
+        assert program.match({'sn': 'Smoothy'})
+
+        try:
+            Filter.approx_matcher = 'edit_distance'
+            assert not program.match({'sn': 'Smoothy'})
+            assert program.match({'sn': 'Smitt'})
+        finally:
+            Filter.approx_matcher = 'soundex'
+
+        assert program.match({'sn': 'Smoothy'})
+
+    def test_instructions(self):
+        program = Filter.parse('(&(a=1)(|(b=2)(c=3))(!(d=4)))').to_program()
+        assert len(program) == 8
+        assert program.attrs == ('a', 'b', 'c', 'd')
+        assert program.disassemble().splitlines()[1] == '     3 JUMP_IF_FALSE 24'
+
+    def test_shared_pools(self):
+        program = Filter.parse('(|(&(a=1)(b=2))(&(a=1)(b=3)))').to_program()
+        assert program.attrs == ('a', 'b')
+        assert len(program.operands) == 3
+
+    def test_empty_groups(self):
+        assert GroupAnd([]).to_program().match({})
+        assert not GroupOr([]).to_program().match({})
+        assert GroupNot([]).to_program().match({})
+
+    def test_not_swallows_attribute_error(self):
+        filt = Filter.parse('(&(!(sn=smith))(age>=18))')
+        entry = {'sn': [3, 'smith'], 'age': '42'}
+        assert filt.to_program().match(entry) == filt.match(entry)
+
+        with pytest.raises(AttributeError):
+            Filter.parse('(sn=smith)').to_program().match({'sn': [3]})
+
+    def test_deep_nesting(self):
+        filt = Filter.attribute('a').equal_to('1')
+        for i in range(5000):
+            filt = GroupNot([filt]) if i % 2 else GroupAnd([filt, Filter.attribute('b').present()])
+
+        program = filt.to_program()
+        assert program.match({'a': '1', 'b': 'x'})
+        assert not program.match({'a': '2', 'b': 'x'})
+
+    def test_pickle(self):
+        program = Filter.parse(self.filters[8]).to_program()
+        restored = pickle.loads(pickle.dumps(program))
+        assert restored == program
+        assert [restored.match(e) for e in self.entries] == [program.match(e) for e in self.entries]
+
+    def test_filter_records(self):
+        program = Filter.parse('(sn=smith)').to_program()
+        assert list(program.filter_records(self.entries)) == [self.entries[0], self.entries[1], self.entries[4]]
+        assert list(program.match_many(self.entries[:2])) == [True, True]
+
+    def test_constructor(self):
+        program = Filter.parse('(a=1)').to_program()
+        assert Program(program.code, program.attrs, program.operands, program.handlers) == program